@@ -1,12 +1,14 @@
 # app/api/advertisers.py - Advertiser API endpoints
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 from datetime import datetime
+from uuid import UUID
+from ..cache import invalidate_analytics_cache
 from ..database import get_db
 from ..models.advertiser import Advertiser
 from ..services.advertiser_service import AdvertiserService
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 
 router = APIRouter()
 
@@ -18,10 +20,12 @@ class AdvertiserCreate(BaseModel):
     contact_phone: Optional[str] = Field(None, max_length=50)
     monthly_ad_spend: Optional[float] = Field(None, gt=0)
     account_manager: Optional[str] = Field(None, max_length=100)
-    tier: str = Field("standard", regex="^(premium|standard|basic)$")
+    tier: Literal["premium", "standard", "basic"] = "standard"
 
 class AdvertiserResponse(BaseModel):
-    id: str
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: UUID
     name: str
     company_name: str
     industry: str
@@ -32,9 +36,10 @@ class AdvertiserResponse(BaseModel):
     tier: str
     is_active: bool
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+class AdvertiserPage(BaseModel):
+    items: List[AdvertiserResponse]
+    next_cursor: Optional[str] = None
 
 class AdvertiserUpdate(BaseModel):
     name: Optional[str] = None
@@ -49,45 +54,50 @@ class AdvertiserUpdate(BaseModel):
 @router.post("/", response_model=AdvertiserResponse)
 async def create_advertiser(
     advertiser: AdvertiserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new advertiser."""
     advertiser_service = AdvertiserService(db)
     
     # Check if advertiser with same email already exists
-    existing = advertiser_service.get_by_email(advertiser.contact_email)
+    existing = await advertiser_service.get_by_email(advertiser.contact_email)
     if existing:
         raise HTTPException(
             status_code=400, 
             detail="Advertiser with this email already exists"
         )
     
-    return advertiser_service.create_advertiser(advertiser)
+    created = await advertiser_service.create_advertiser(advertiser)
+    await invalidate_analytics_cache()
+    return created
 
-@router.get("/", response_model=List[AdvertiserResponse])
+@router.get("/", response_model=AdvertiserPage)
 async def get_advertisers(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     tier: Optional[str] = None,
     industry: Optional[str] = None,
     is_active: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get advertisers with filtering and pagination."""
+    """Get advertisers with filtering and keyset pagination (newest first)."""
     advertiser_service = AdvertiserService(db)
-    return advertiser_service.get_advertisers(
-        skip=skip, 
-        limit=limit, 
-        tier=tier, 
-        industry=industry,
-        is_active=is_active
-    )
+    try:
+        return await advertiser_service.get_advertisers(
+            cursor=cursor, 
+            limit=limit, 
+            tier=tier, 
+            industry=industry,
+            is_active=is_active
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{advertiser_id}", response_model=AdvertiserResponse)
-async def get_advertiser(advertiser_id: str, db: Session = Depends(get_db)):
+async def get_advertiser(advertiser_id: str, db: AsyncSession = Depends(get_db)):
     """Get a specific advertiser by ID."""
     advertiser_service = AdvertiserService(db)
-    advertiser = advertiser_service.get_advertiser(advertiser_id)
+    advertiser = await advertiser_service.get_advertiser(advertiser_id)
     if not advertiser:
         raise HTTPException(status_code=404, detail="Advertiser not found")
     return advertiser
@@ -96,22 +106,24 @@ async def get_advertiser(advertiser_id: str, db: Session = Depends(get_db)):
 async def update_advertiser(
     advertiser_id: str,
     advertiser_update: AdvertiserUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an advertiser."""
     advertiser_service = AdvertiserService(db)
-    advertiser = advertiser_service.update_advertiser(advertiser_id, advertiser_update)
+    advertiser = await advertiser_service.update_advertiser(advertiser_id, advertiser_update)
     if not advertiser:
         raise HTTPException(status_code=404, detail="Advertiser not found")
+    await invalidate_analytics_cache()
     return advertiser
 
 @router.delete("/{advertiser_id}")
-async def deactivate_advertiser(advertiser_id: str, db: Session = Depends(get_db)):
+async def deactivate_advertiser(advertiser_id: str, db: AsyncSession = Depends(get_db)):
     """Deactivate an advertiser (soft delete)."""
     advertiser_service = AdvertiserService(db)
-    success = advertiser_service.deactivate_advertiser(advertiser_id)
+    success = await advertiser_service.deactivate_advertiser(advertiser_id)
     if not success:
         raise HTTPException(status_code=404, detail="Advertiser not found")
+    await invalidate_analytics_cache()
     return {"message": "Advertiser deactivated successfully"}
 
 @router.get("/{advertiser_id}/campaigns")
@@ -119,11 +131,11 @@ async def get_advertiser_campaigns(
     advertiser_id: str,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all campaigns for a specific advertiser."""
     advertiser_service = AdvertiserService(db)
-    campaigns = advertiser_service.get_advertiser_campaigns(
+    campaigns = await advertiser_service.get_advertiser_campaigns(
         advertiser_id, skip, limit
     )
     if campaigns is None:
@@ -135,11 +147,11 @@ async def get_advertiser_performance(
     advertiser_id: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get performance metrics for all advertiser campaigns."""
     advertiser_service = AdvertiserService(db)
-    performance = advertiser_service.get_advertiser_performance(
+    performance = await advertiser_service.get_advertiser_performance(
         advertiser_id, start_date, end_date
     )
     if performance is None:
@@ -1,9 +1,12 @@
 # app/api/analytics.py - Analytics API endpoints
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional, Dict, Any
 from datetime import datetime, date, timedelta
-from ..database import get_db
+import asyncio
+from fastapi_cache.decorator import cache
+from ..cache import ANALYTICS_NAMESPACE, query_key_builder
+from ..database import SessionLocal, get_db
 from ..services.analytics_service import AnalyticsService
 from ..utils.math_utils import calculate_statistical_significance
 from pydantic import BaseModel, Field
@@ -30,9 +33,10 @@ class PerformanceReport(BaseModel):
     performance_trends: Dict[str, Any]
 
 @router.get("/dashboard", response_model=DashboardMetrics)
+@cache(expire=60, namespace=ANALYTICS_NAMESPACE, key_builder=query_key_builder)
 async def get_dashboard_metrics(
     date_range: int = Query(7, description="Number of days to include"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get high-level dashboard metrics."""
     analytics_service = AnalyticsService(db)
@@ -40,7 +44,7 @@ async def get_dashboard_metrics(
     end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=date_range)
     
-    metrics = analytics_service.get_dashboard_metrics(start_date, end_date)
+    metrics = await analytics_service.get_dashboard_metrics(start_date, end_date)
     return metrics
 
 @router.get("/performance", response_model=PerformanceReport)
@@ -49,8 +53,8 @@ async def get_performance_report(
     end_date: Optional[date] = None,
     campaign_ids: Optional[List[str]] = Query(None),
     advertiser_ids: Optional[List[str]] = Query(None),
-    group_by: str = Query("day", regex="^(hour|day|week|month)$"),
-    db: Session = Depends(get_db)
+    group_by: Literal["hour", "day", "week", "month"] = Query("day"),
+    db: AsyncSession = Depends(get_db)
 ):
     """Generate comprehensive performance report."""
     analytics_service = AnalyticsService(db)
@@ -61,7 +65,7 @@ async def get_performance_report(
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    report = analytics_service.generate_performance_report(
+    report = await analytics_service.generate_performance_report(
         start_date=start_date,
         end_date=end_date,
         campaign_ids=campaign_ids,
@@ -72,12 +76,13 @@ async def get_performance_report(
     return report
 
 @router.get("/trends")
+@cache(expire=300, namespace=ANALYTICS_NAMESPACE, key_builder=query_key_builder)
 async def get_performance_trends(
-    metric: str = Query("impressions", regex="^(impressions|clicks|conversions|spend|ctr|cpc|roas)$"),
-    period: str = Query("daily", regex="^(hourly|daily|weekly|monthly)$"),
+    metric: Literal["impressions", "clicks", "conversions", "spend", "ctr", "cpc", "roas"] = Query("impressions"),
+    period: Literal["hourly", "daily", "weekly", "monthly"] = Query("daily"),
     days: int = Query(30, ge=1, le=365),
     campaign_ids: Optional[List[str]] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get performance trends for specific metrics."""
     analytics_service = AnalyticsService(db)
@@ -85,7 +90,7 @@ async def get_performance_trends(
     end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=days)
     
-    trends = analytics_service.get_performance_trends(
+    trends = await analytics_service.get_performance_trends(
         metric=metric,
         period=period,
         start_date=start_date,
@@ -96,35 +101,44 @@ async def get_performance_trends(
     return trends
 
 @router.get("/benchmarks")
+@cache(expire=3600, namespace=ANALYTICS_NAMESPACE, key_builder=query_key_builder)
 async def get_industry_benchmarks(
     industry: Optional[str] = None,
     tier: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get industry performance benchmarks."""
     analytics_service = AnalyticsService(db)
     
-    benchmarks = analytics_service.get_industry_benchmarks(
+    benchmarks = await analytics_service.get_industry_benchmarks(
         industry=industry,
         tier=tier
     )
     
     return benchmarks
 
+async def _load_campaign_metric_data(campaign_id: str, metric: str):
+    """Load one campaign's metric series on its own session so lookups can run concurrently."""
+    async with SessionLocal() as db:
+        return await AnalyticsService(db).get_campaign_metric_data(campaign_id, metric)
+
 @router.post("/ab-test")
 async def run_ab_test_analysis(
     control_campaign_id: str,
     test_campaign_id: str,
-    metric: str = Query("ctr", regex="^(ctr|cvr|cpc|roas)$"),
+    metric: Literal["ctr", "cvr", "cpc", "roas"] = Query("ctr"),
     confidence_level: float = Query(0.95, ge=0.8, le=0.99),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Run A/B test statistical analysis between two campaigns."""
     analytics_service = AnalyticsService(db)
     
-    # Get performance data for both campaigns
-    control_data = analytics_service.get_campaign_metric_data(control_campaign_id, metric)
-    test_data = analytics_service.get_campaign_metric_data(test_campaign_id, metric)
+    # Get performance data for both campaigns concurrently; an AsyncSession
+    # is not safe for concurrent use, so each lookup gets its own session
+    control_data, test_data = await asyncio.gather(
+        _load_campaign_metric_data(control_campaign_id, metric),
+        _load_campaign_metric_data(test_campaign_id, metric)
+    )
     
     if not control_data or not test_data:
         raise HTTPException(
@@ -146,14 +160,14 @@ async def run_ab_test_analysis(
 
 @router.get("/alerts")
 async def get_performance_alerts(
-    severity: Optional[str] = Query(None, regex="^(low|medium|high|critical)$"),
+    severity: Optional[Literal["low", "medium", "high", "critical"]] = Query(None),
     limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get performance alerts and anomalies."""
     analytics_service = AnalyticsService(db)
     
-    alerts = analytics_service.get_performance_alerts(
+    alerts = await analytics_service.get_performance_alerts(
         severity=severity,
         limit=limit
     )
@@ -164,13 +178,13 @@ async def get_performance_alerts(
 async def get_performance_forecast(
     campaign_id: str,
     days_ahead: int = Query(7, ge=1, le=90),
-    metric: str = Query("impressions", regex="^(impressions|clicks|conversions|spend)$"),
-    db: Session = Depends(get_db)
+    metric: Literal["impressions", "clicks", "conversions", "spend"] = Query("impressions"),
+    db: AsyncSession = Depends(get_db)
 ):
     """Generate performance forecast for a campaign."""
     analytics_service = AnalyticsService(db)
     
-    forecast = analytics_service.generate_performance_forecast(
+    forecast = await analytics_service.generate_performance_forecast(
         campaign_id=campaign_id,
         days_ahead=days_ahead,
         metric=metric
@@ -185,16 +199,17 @@ async def get_performance_forecast(
     return forecast
 
 @router.get("/audience-insights")
+@cache(expire=300, namespace=ANALYTICS_NAMESPACE, key_builder=query_key_builder)
 async def get_audience_insights(
     campaign_ids: Optional[List[str]] = Query(None),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get audience demographic and behavioral insights."""
     analytics_service = AnalyticsService(db)
     
-    insights = analytics_service.get_audience_insights(
+    insights = await analytics_service.get_audience_insights(
         campaign_ids=campaign_ids,
         start_date=start_date,
         end_date=end_date
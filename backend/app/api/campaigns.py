@@ -1,19 +1,22 @@
 # app/api/campaigns.py - Campaign API endpoints
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime, date
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from datetime import datetime, date, timezone
+from uuid import UUID
+from fastapi_cache.decorator import cache
+from ..cache import CAMPAIGN_PERFORMANCE_NAMESPACE, invalidate_analytics_cache, query_key_builder
 from ..database import get_db
 from ..models.campaign import Campaign, Ad
 from ..services.campaign_service import CampaignService
 from ..utils.math_utils import calculate_campaign_performance
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 router = APIRouter()
 
 class CampaignCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
-    advertiser_id: str
+    advertiser_id: UUID
     start_date: datetime
     end_date: datetime
     budget: float = Field(..., gt=0)
@@ -21,11 +24,21 @@ class CampaignCreate(BaseModel):
     target_demographics: Optional[dict] = None
     target_content_types: Optional[dict] = None
     geographic_targeting: Optional[dict] = None
+    
+    @field_validator("start_date", "end_date")
+    @classmethod
+    def as_utc(cls, value: datetime) -> datetime:
+        """Treat naive datetimes as UTC so every campaign date is tz-aware."""
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
 
 class CampaignResponse(BaseModel):
-    id: str
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: UUID
     name: str
-    advertiser_id: str
+    advertiser_id: UUID
     start_date: datetime
     end_date: datetime
     budget: float
@@ -34,14 +47,15 @@ class CampaignResponse(BaseModel):
     clicks: int
     conversions: int
     spend: float
-    
-    class Config:
-        from_attributes = True
+
+class CampaignPage(BaseModel):
+    items: List[CampaignResponse]
+    next_cursor: Optional[str] = None
 
 @router.post("/", response_model=CampaignResponse)
 async def create_campaign(
     campaign: CampaignCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new ad campaign with business logic validation."""
     campaign_service = CampaignService(db)
@@ -53,30 +67,35 @@ async def create_campaign(
     if campaign.daily_budget and campaign.daily_budget * 30 > campaign.budget:
         raise HTTPException(status_code=400, detail="Daily budget exceeds monthly budget")
     
-    return campaign_service.create_campaign(campaign)
+    db_campaign = await campaign_service.create_campaign(campaign)
+    await invalidate_analytics_cache()
+    return db_campaign
 
-@router.get("/", response_model=List[CampaignResponse])
+@router.get("/", response_model=CampaignPage)
 async def get_campaigns(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     status: Optional[str] = None,
     advertiser_id: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get campaigns with filtering and pagination."""
+    """Get campaigns with filtering and keyset pagination (newest first)."""
     campaign_service = CampaignService(db)
-    return campaign_service.get_campaigns(
-        skip=skip, 
-        limit=limit, 
-        status=status, 
-        advertiser_id=advertiser_id
-    )
+    try:
+        return await campaign_service.get_campaigns(
+            cursor=cursor, 
+            limit=limit, 
+            status=status, 
+            advertiser_id=advertiser_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{campaign_id}", response_model=CampaignResponse)
-async def get_campaign(campaign_id: str, db: Session = Depends(get_db)):
+async def get_campaign(campaign_id: str, db: AsyncSession = Depends(get_db)):
     """Get a specific campaign by ID."""
     campaign_service = CampaignService(db)
-    campaign = campaign_service.get_campaign(campaign_id)
+    campaign = await campaign_service.get_campaign(campaign_id)
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
     return campaign
@@ -84,27 +103,26 @@ async def get_campaign(campaign_id: str, db: Session = Depends(get_db)):
 @router.put("/{campaign_id}/status")
 async def update_campaign_status(
     campaign_id: str,
-    status: str,
-    db: Session = Depends(get_db)
+    status: Literal["draft", "active", "paused", "completed"],
+    db: AsyncSession = Depends(get_db)
 ):
     """Update campaign status (draft, active, paused, completed)."""
-    valid_statuses = ["draft", "active", "paused", "completed"]
-    if status not in valid_statuses:
-        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {valid_statuses}")
-    
     campaign_service = CampaignService(db)
-    return campaign_service.update_campaign_status(campaign_id, status)
+    updated = await campaign_service.update_campaign_status(campaign_id, status)
+    await invalidate_analytics_cache()
+    return updated
 
 @router.get("/{campaign_id}/performance")
+@cache(expire=60, namespace=CAMPAIGN_PERFORMANCE_NAMESPACE, key_builder=query_key_builder)
 async def get_campaign_performance(
     campaign_id: str,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get detailed performance metrics for a campaign."""
     campaign_service = CampaignService(db)
-    performance = campaign_service.get_campaign_performance(
+    performance = await campaign_service.get_campaign_performance(
         campaign_id, start_date, end_date
     )
     
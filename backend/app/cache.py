@@ -0,0 +1,45 @@
+# app/cache.py - Response caching helpers
+import hashlib
+import logging
+from typing import Callable, Optional
+from fastapi_cache import FastAPICache
+from starlette.requests import Request
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_NAMESPACE = "analytics"
+CAMPAIGN_PERFORMANCE_NAMESPACE = "campaign-performance"
+
+def query_key_builder(
+    func: Callable,
+    namespace: Optional[str] = "",
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: Optional[tuple] = None,
+    kwargs: Optional[dict] = None,
+) -> str:
+    """
+    Build a cache key from the endpoint name, path and query parameters.
+    Injected dependencies such as the DB session are deliberately left out.
+    """
+    if request is not None:
+        params = [request.url.path] + sorted(request.query_params.multi_items())
+    else:
+        params = sorted(
+            (name, repr(value))
+            for name, value in (kwargs or {}).items()
+            if name != "db"
+        )
+    digest = hashlib.md5(
+        f"{func.__module__}:{func.__name__}:{params}".encode()
+    ).hexdigest()
+    return f"{FastAPICache.get_prefix()}:{namespace}:{digest}"
+
+async def invalidate_analytics_cache() -> None:
+    """Drop cached analytics responses after campaign/advertiser writes."""
+    try:
+        await FastAPICache.clear(namespace=ANALYTICS_NAMESPACE)
+    except Exception:
+        # A cache outage must never fail the write that triggered it
+        logger.warning("Failed to invalidate analytics cache", exc_info=True)
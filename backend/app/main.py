@@ -1,19 +1,31 @@
 # app/main.py - FastAPI main application
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import asyncio
+import logging
 import uvicorn
 from .database import get_db
 from .models import campaign, advertiser, ad_metrics
 from .api import campaigns, advertisers, analytics
 from .config import settings
+from .tasks import partition_helper_exists, run_partition_maintenance_loop
+from .utils.math_utils import warm_jit_kernels
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Disney Streaming Ad Campaign Management",
     description="Ad Experience (AX) team platform for campaign workflow management",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for React frontend
@@ -25,6 +37,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON payloads (analytics daily breakdowns) for clients
+# sending Accept-Encoding: gzip; small responses are passed through as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+@app.on_event("startup")
+async def init_cache():
+    redis = aioredis.from_url(settings.redis_url)
+    FastAPICache.init(RedisBackend(redis), prefix="ax")
+
+@app.on_event("startup")
+async def warm_math_kernels():
+    warm_jit_kernels()
+
+@app.on_event("startup")
+async def start_partition_maintenance():
+    # The helper comes with the ad_metrics schema; without it every cycle
+    # would fail, so only start maintaining partitions once it exists
+    try:
+        ready = await partition_helper_exists()
+    except Exception:
+        logger.exception("Could not check for the ad_metrics partition helper")
+        ready = False
+    
+    if ready:
+        app.state.partition_maintenance = asyncio.create_task(run_partition_maintenance_loop())
+    else:
+        logger.warning("create_ad_metrics_partition() not installed; partition maintenance not started")
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    partition_maintenance = getattr(app.state, "partition_maintenance", None)
+    if partition_maintenance is not None:
+        partition_maintenance.cancel()
+
 # Include API routers
 app.include_router(campaigns.router, prefix="/api/v1/campaigns", tags=["campaigns"])
 app.include_router(advertisers.router, prefix="/api/v1/advertisers", tags=["advertisers"])
@@ -1,27 +1,32 @@
 # app/models/ad_metrics.py - Analytics and metrics model
-from sqlalchemy import Column, Integer, Float, DateTime, String, ForeignKey
+from sqlalchemy import (
+    Column, Integer, Float, DateTime, String, ForeignKey, Index, UniqueConstraint,
+    BigInteger, DDL, cast, event
+)
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
-import uuid
 from ..database import Base
+from ..utils.ids import new_id
 
 class AdMetrics(Base):
     __tablename__ = "ad_metrics"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=new_id)
     campaign_id = Column(UUID(as_uuid=True), ForeignKey("campaigns.id"))
     
-    # Time dimension
-    date = Column(DateTime, nullable=False)
+    # Time dimension (also the partition key, hence part of the primary key)
+    date = Column(DateTime, primary_key=True, nullable=False)
     hour = Column(Integer)  # 0-23 for hourly granularity
     
     # Core metrics
     impressions = Column(Integer, default=0)
     clicks = Column(Integer, default=0)
     conversions = Column(Integer, default=0)
-    spend = Column(Float, default=0.0)
-    revenue = Column(Float, default=0.0)
+    # Money in whole cents: integer SUMs are exact and cheaper than float ones
+    spend_cents = Column(BigInteger, default=0)
+    revenue_cents = Column(BigInteger, default=0)
     
     # Calculated metrics (computed fields)
     ctr = Column(Float)  # Click-through rate
@@ -40,4 +45,135 @@ class AdMetrics(Base):
     
     # Relationships
     campaign = relationship("Campaign", back_populates="metrics")
+    
+    __table_args__ = (
+        # One row per campaign/date/hour; the ingestion upsert targets this.
+        # Its (campaign_id, date, ...) prefix also serves every
+        # performance/trend/forecast query filtering on campaign + date range.
+        UniqueConstraint(
+            "campaign_id", "date", "hour",
+            name="uq_ad_metrics_campaign_date_hour",
+            postgresql_nulls_not_distinct=True
+        ),
+        Index("ix_ad_metrics_date", "date"),
+        # Monthly range partitions let time-filtered queries prune to the
+        # months they touch; partitions are created by create_ad_metrics_partition()
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+    
+    @hybrid_property
+    def spend(self) -> float:
+        return (self.spend_cents or 0) / 100
+    
+    @spend.setter
+    def spend(self, value: float) -> None:
+        self.spend_cents = round(value * 100)
+    
+    @spend.expression
+    def spend(cls):
+        return cast(cls.spend_cents, Float) / 100.0
+    
+    @hybrid_property
+    def revenue(self) -> float:
+        return (self.revenue_cents or 0) / 100
+    
+    @revenue.setter
+    def revenue(self, value: float) -> None:
+        self.revenue_cents = round(value * 100)
+    
+    @revenue.expression
+    def revenue(cls):
+        return cast(cls.revenue_cents, Float) / 100.0
+
+# One statement per DDL: asyncpg runs each as a prepared statement, and
+# Postgres rejects several commands in one prepared statement
+event.listen(
+    AdMetrics.__table__,
+    "after_create",
+    DDL(
+        "CREATE TABLE ad_metrics_default PARTITION OF ad_metrics DEFAULT"
+    ).execute_if(dialect="postgresql")
+)
+
+event.listen(
+    AdMetrics.__table__,
+    "after_create",
+    DDL("""
+        CREATE OR REPLACE FUNCTION create_ad_metrics_partition(month_start date)
+        RETURNS void AS $$
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %%I PARTITION OF ad_metrics FOR VALUES FROM (%%L) TO (%%L)',
+                'ad_metrics_' || to_char(month_start, 'YYYY_MM'),
+                date_trunc('month', month_start),
+                date_trunc('month', month_start) + interval '1 month'
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """).execute_if(dialect="postgresql")
+)
+
+# Keep the lifetime totals on campaigns in step with ingested metrics so
+# unfiltered performance reads come straight off the campaign row. UPDATEs
+# within a campaign (the ingestion upsert merging counters) apply only the
+# delta; DELETEs, and UPDATEs that move a row to another campaign, take OLD
+# off OLD.campaign_id. A row moving between partitions reaches the trigger as
+# DELETE + INSERT. TRUNCATE is not tracked.
+event.listen(
+    AdMetrics.__table__,
+    "after_create",
+    DDL("""
+        CREATE OR REPLACE FUNCTION bump_campaign_totals() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND NEW.campaign_id IS NOT DISTINCT FROM OLD.campaign_id THEN
+                UPDATE campaigns SET
+                    impressions_served = coalesce(impressions_served, 0)
+                        + coalesce(NEW.impressions, 0) - coalesce(OLD.impressions, 0),
+                    clicks = coalesce(clicks, 0)
+                        + coalesce(NEW.clicks, 0) - coalesce(OLD.clicks, 0),
+                    conversions = coalesce(conversions, 0)
+                        + coalesce(NEW.conversions, 0) - coalesce(OLD.conversions, 0),
+                    spend_cents = coalesce(spend_cents, 0)
+                        + coalesce(NEW.spend_cents, 0) - coalesce(OLD.spend_cents, 0),
+                    revenue_cents = coalesce(revenue_cents, 0)
+                        + coalesce(NEW.revenue_cents, 0) - coalesce(OLD.revenue_cents, 0)
+                WHERE id = NEW.campaign_id;
+                RETURN NULL;
+            END IF;
+            
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE campaigns SET
+                    impressions_served = coalesce(impressions_served, 0) - coalesce(OLD.impressions, 0),
+                    clicks = coalesce(clicks, 0) - coalesce(OLD.clicks, 0),
+                    conversions = coalesce(conversions, 0) - coalesce(OLD.conversions, 0),
+                    spend_cents = coalesce(spend_cents, 0) - coalesce(OLD.spend_cents, 0),
+                    revenue_cents = coalesce(revenue_cents, 0) - coalesce(OLD.revenue_cents, 0)
+                WHERE id = OLD.campaign_id;
+            END IF;
+            
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE campaigns SET
+                    impressions_served = coalesce(impressions_served, 0) + coalesce(NEW.impressions, 0),
+                    clicks = coalesce(clicks, 0) + coalesce(NEW.clicks, 0),
+                    conversions = coalesce(conversions, 0) + coalesce(NEW.conversions, 0),
+                    spend_cents = coalesce(spend_cents, 0) + coalesce(NEW.spend_cents, 0),
+                    revenue_cents = coalesce(revenue_cents, 0) + coalesce(NEW.revenue_cents, 0)
+                WHERE id = NEW.campaign_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """).execute_if(dialect="postgresql")
+)
 
+event.listen(
+    AdMetrics.__table__,
+    "after_create",
+    DDL("""
+        CREATE TRIGGER ad_metrics_bump_campaign_totals
+        AFTER INSERT OR DELETE
+            OR UPDATE OF campaign_id, impressions, clicks, conversions, spend_cents, revenue_cents
+        ON ad_metrics
+        FOR EACH ROW EXECUTE FUNCTION bump_campaign_totals()
+    """).execute_if(dialect="postgresql")
+)
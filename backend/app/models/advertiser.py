@@ -1,15 +1,14 @@
 # app/models/advertiser.py - Advertiser model
-from sqlalchemy import Column, String, DateTime, Float, Boolean, Text
+from sqlalchemy import Column, String, DateTime, Float, Boolean, Text, Index, func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from datetime import datetime
-import uuid
 from ..database import Base
+from ..utils.ids import new_id
 
 class Advertiser(Base):
     __tablename__ = "advertisers"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=new_id)
     name = Column(String(255), nullable=False)
     company_name = Column(String(255))
     industry = Column(String(100))
@@ -25,7 +24,14 @@ class Advertiser(Base):
     
     # Account status
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relationships
     campaigns = relationship("Campaign", back_populates="advertiser")
+    
+    __table_args__ = (
+        # Keyset pagination order for advertiser listings
+        Index("ix_advertisers_created_at_id", created_at.desc(), id.desc()),
+    )
+    # Fetch server-generated timestamps with INSERT ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
@@ -1,55 +1,115 @@
 # app/models/campaign.py - Campaign data model
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey
+from sqlalchemy import (
+    Column, Integer, BigInteger, Numeric, String, DateTime, Float, Boolean, Text,
+    ForeignKey, Index, DDL, FetchedValue, cast, event, func
+)
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from datetime import datetime
-import uuid
 from ..database import Base
+from ..utils.ids import new_id
 
 class Campaign(Base):
     __tablename__ = "campaigns"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=new_id)
     name = Column(String(255), nullable=False)
     advertiser_id = Column(UUID(as_uuid=True), ForeignKey("advertisers.id"))
     
     # Campaign details
-    start_date = Column(DateTime, nullable=False)
-    end_date = Column(DateTime, nullable=False)
-    budget = Column(Float, nullable=False)
-    daily_budget = Column(Float)
+    # timestamptz like the audit fields: the UI sends ISO strings with "Z"
+    start_date = Column(DateTime(timezone=True), nullable=False)
+    end_date = Column(DateTime(timezone=True), nullable=False)
+    # Exact decimal storage; asdecimal=False keeps Python-side math in floats
+    budget = Column(Numeric(18, 4, asdecimal=False), nullable=False)
+    daily_budget = Column(Numeric(18, 4, asdecimal=False))
     
     # Targeting criteria
     target_demographics = Column(JSONB)
     target_content_types = Column(JSONB)  # Movies, TV shows, etc.
     geographic_targeting = Column(JSONB)
     
-    # Performance tracking
-    impressions_served = Column(Integer, default=0)
-    clicks = Column(Integer, default=0)
-    conversions = Column(Integer, default=0)
-    spend = Column(Float, default=0.0)
+    # Performance tracking (lifetime totals kept current by the
+    # ad_metrics_bump_campaign_totals trigger in ad_metrics.py). 8-byte: at
+    # the daily impression limit a 4-byte total overflows within days
+    impressions_served = Column(BigInteger, default=0)
+    clicks = Column(BigInteger, default=0)
+    conversions = Column(BigInteger, default=0)
+    spend_cents = Column(BigInteger, default=0)  # whole cents, summed exactly
+    revenue_cents = Column(BigInteger, default=0)
     
     # Campaign status
     status = Column(String(50), default="draft")  # draft, active, paused, completed
     is_active = Column(Boolean, default=True)
     
     # Audit fields
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Maintained by the campaigns_set_updated_at trigger below
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        server_onupdate=FetchedValue(),
+        nullable=False
+    )
     created_by = Column(String(100))
     
     # Relationships
     advertiser = relationship("Advertiser", back_populates="campaigns")
     ads = relationship("Ad", back_populates="campaign")
     metrics = relationship("AdMetrics", back_populates="campaign")
+    
+    __table_args__ = (
+        # Keyset pagination order for campaign listings
+        Index("ix_campaigns_created_at_id", created_at.desc(), id.desc()),
+        Index("ix_campaigns_advertiser_status", "advertiser_id", "status"),
+        Index("ix_campaigns_status_start", "status", "start_date"),
+    )
+    # Fetch server-generated timestamps with INSERT ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
+    
+    @hybrid_property
+    def spend(self) -> float:
+        return (self.spend_cents or 0) / 100
+    
+    @spend.setter
+    def spend(self, value: float) -> None:
+        self.spend_cents = round(value * 100)
+    
+    @spend.expression
+    def spend(cls):
+        return cast(cls.spend_cents, Float) / 100.0
+
+event.listen(
+    Campaign.__table__,
+    "after_create",
+    DDL("""
+        CREATE OR REPLACE FUNCTION trigger_set_timestamp() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at = NOW();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """).execute_if(dialect="postgresql")
+)
+
+# Separate DDL: asyncpg prepares each one, and a prepared statement may
+# hold only a single command
+event.listen(
+    Campaign.__table__,
+    "after_create",
+    DDL("""
+        CREATE TRIGGER campaigns_set_updated_at
+        BEFORE UPDATE ON campaigns
+        FOR EACH ROW EXECUTE FUNCTION trigger_set_timestamp()
+    """).execute_if(dialect="postgresql")
+)
 
 
 class Ad(Base):
     __tablename__ = "ads"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    campaign_id = Column(UUID(as_uuid=True), ForeignKey("campaigns.id"))
+    id = Column(UUID(as_uuid=True), primary_key=True, default=new_id)
+    campaign_id = Column(UUID(as_uuid=True), ForeignKey("campaigns.id"), index=True)
     
     # Ad content
     title = Column(String(100), nullable=False)
@@ -66,5 +126,15 @@ class Ad(Base):
     quality_score = Column(Float)
     approval_status = Column(String(50), default="pending")
     
+    # Audit fields
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
     # Relationships
     campaign = relationship("Campaign", back_populates="ads")
+    
+    __table_args__ = (
+        # Quality report windows filter ads by creation time
+        Index("ix_ads_created_at", "created_at"),
+    )
+    # Fetch server-generated timestamps with INSERT ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
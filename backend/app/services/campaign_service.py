@@ -1,53 +1,108 @@
 # app/services/campaign_service.py - Business logic service
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime, date
+from sqlalchemy import BigInteger, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Iterable, List, Optional
+from datetime import date
 from ..models.campaign import Campaign, Ad
 from ..models.ad_metrics import AdMetrics
 from ..utils.math_utils import calculate_roi, calculate_projected_performance
+from ..utils.ids import new_id
+from ..utils.pagination import decode_cursor, encode_cursor
+
+# Rows per executemany/COPY batch when ingesting metrics
+METRICS_BATCH_SIZE = 5000
+
+# Additive counters merged when a campaign/date/hour row is re-ingested
+_METRIC_COUNTERS = ("impressions", "clicks", "conversions", "spend_cents", "revenue_cents")
+
+# Column order for the COPY ingestion path
+_COPY_COLUMNS = ("id", "campaign_id", "date", "hour") + _METRIC_COUNTERS
 
 class CampaignService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def create_campaign(self, campaign_data) -> Campaign:
+    async def create_campaign(self, campaign_data) -> Campaign:
         """Create a new campaign with business validation."""
         # Business logic: Set daily budget if not provided
         if not campaign_data.daily_budget:
             days_in_campaign = (campaign_data.end_date - campaign_data.start_date).days
             campaign_data.daily_budget = campaign_data.budget / max(days_in_campaign, 1)
         
-        db_campaign = Campaign(**campaign_data.dict())
+        db_campaign = Campaign(**campaign_data.model_dump())
         self.db.add(db_campaign)
-        self.db.commit()
-        self.db.refresh(db_campaign)
+        await self.db.commit()
+        await self.db.refresh(db_campaign)
         
         return db_campaign
     
-    def get_campaigns(
+    async def get_campaigns(
         self, 
-        skip: int = 0, 
+        cursor: Optional[str] = None, 
         limit: int = 100, 
         status: Optional[str] = None,
         advertiser_id: Optional[str] = None
-    ) -> List[Campaign]:
-        """Get campaigns with filtering."""
-        query = self.db.query(Campaign)
+    ) -> dict:
+        """
+        Get campaigns with filtering, newest first.
+        Uses keyset pagination on (created_at, id) so deep pages cost the
+        same as the first one.
+        """
+        # Project only the listing columns; skips the JSONB targeting payloads
+        # and ORM identity-map bookkeeping for every row on the page.
+        stmt = select(
+            Campaign.id,
+            Campaign.name,
+            Campaign.advertiser_id,
+            Campaign.start_date,
+            Campaign.end_date,
+            Campaign.budget,
+            Campaign.status,
+            Campaign.impressions_served,
+            Campaign.clicks,
+            Campaign.conversions,
+            Campaign.spend.label("spend"),
+            Campaign.created_at,
+        )
         
         if status:
-            query = query.filter(Campaign.status == status)
+            stmt = stmt.where(Campaign.status == status)
         if advertiser_id:
-            query = query.filter(Campaign.advertiser_id == advertiser_id)
+            stmt = stmt.where(Campaign.advertiser_id == advertiser_id)
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            stmt = stmt.where(
+                tuple_(Campaign.created_at, Campaign.id) < tuple_(cursor_created_at, cursor_id)
+            )
         
-        return query.offset(skip).limit(limit).all()
+        stmt = stmt.order_by(Campaign.created_at.desc(), Campaign.id.desc()).limit(limit)
+        result = await self.db.execute(stmt)
+        campaigns = result.mappings().all()
+        
+        next_cursor = None
+        if len(campaigns) == limit:
+            last = campaigns[-1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+        
+        return {"items": campaigns, "next_cursor": next_cursor}
     
-    def get_campaign(self, campaign_id: str) -> Optional[Campaign]:
+    async def get_campaign(self, campaign_id: str) -> Optional[Campaign]:
         """Get a specific campaign."""
-        return self.db.query(Campaign).filter(Campaign.id == campaign_id).first()
+        result = await self.db.execute(select(Campaign).where(Campaign.id == campaign_id))
+        return result.scalars().first()
     
-    def update_campaign_status(self, campaign_id: str, status: str) -> Campaign:
+    async def update_campaign_status(self, campaign_id: str, status: str) -> Campaign:
         """Update campaign status with business logic."""
-        campaign = self.get_campaign(campaign_id)
+        # Ads are needed for the activation check; lazy loads are not
+        # available on an AsyncSession, so load them up front.
+        result = await self.db.execute(
+            select(Campaign)
+            .options(selectinload(Campaign.ads))
+            .where(Campaign.id == campaign_id)
+        )
+        campaign = result.scalars().first()
         if not campaign:
             raise ValueError("Campaign not found")
         
@@ -58,42 +113,76 @@ class CampaignService:
                 raise ValueError("Cannot activate campaign without ads")
         
         campaign.status = status
-        campaign.updated_at = datetime.utcnow()
         
-        self.db.commit()
-        self.db.refresh(campaign)
+        await self.db.commit()
+        await self.db.refresh(campaign)
         
         return campaign
     
-    def get_campaign_performance(
+    async def get_campaign_performance(
         self, 
         campaign_id: str, 
         start_date: Optional[date] = None, 
         end_date: Optional[date] = None
     ) -> dict:
         """Get detailed performance metrics."""
-        campaign = self.get_campaign(campaign_id)
+        campaign = await self.get_campaign(campaign_id)
         if not campaign:
             raise ValueError("Campaign not found")
         
-        # Query metrics with date filtering
-        metrics_query = self.db.query(AdMetrics).filter(
-            AdMetrics.campaign_id == campaign_id
-        )
-        
+        # Date filters shared by the totals and daily breakdown queries
+        filters = [AdMetrics.campaign_id == campaign_id]
         if start_date:
-            metrics_query = metrics_query.filter(AdMetrics.date >= start_date)
+            filters.append(AdMetrics.date >= start_date)
         if end_date:
-            metrics_query = metrics_query.filter(AdMetrics.date <= end_date)
+            filters.append(AdMetrics.date <= end_date)
         
-        metrics = metrics_query.all()
+        def total(column):
+            # Postgres sums BIGINT columns as NUMERIC; cast back so both
+            # paths return ints rather than Decimal
+            return func.sum(column).cast(BigInteger)
         
-        # Aggregate metrics
-        total_impressions = sum(m.impressions for m in metrics)
-        total_clicks = sum(m.clicks for m in metrics)
-        total_conversions = sum(m.conversions for m in metrics)
-        total_spend = sum(m.spend for m in metrics)
-        total_revenue = sum(m.revenue for m in metrics)
+        if not start_date and not end_date:
+            # Lifetime totals are maintained on the campaign row by the
+            # ad_metrics_bump_campaign_totals trigger
+            total_impressions = campaign.impressions_served or 0
+            total_clicks = campaign.clicks or 0
+            total_conversions = campaign.conversions or 0
+            total_spend_cents = campaign.spend_cents or 0
+            total_revenue_cents = campaign.revenue_cents or 0
+        else:
+            # Aggregate metrics in the database rather than pulling every row
+            totals_result = await self.db.execute(
+                select(
+                    func.coalesce(total(AdMetrics.impressions), 0),
+                    func.coalesce(total(AdMetrics.clicks), 0),
+                    func.coalesce(total(AdMetrics.conversions), 0),
+                    func.coalesce(total(AdMetrics.spend_cents), 0),
+                    func.coalesce(total(AdMetrics.revenue_cents), 0),
+                ).where(*filters)
+            )
+            (
+                total_impressions,
+                total_clicks,
+                total_conversions,
+                total_spend_cents,
+                total_revenue_cents,
+            ) = totals_result.one()
+        
+        day = func.date_trunc("day", AdMetrics.date).label("day")
+        daily_result = await self.db.execute(
+            select(
+                day,
+                total(AdMetrics.impressions).label("impressions"),
+                total(AdMetrics.clicks).label("clicks"),
+                total(AdMetrics.conversions).label("conversions"),
+                total(AdMetrics.spend_cents).label("spend_cents"),
+                total(AdMetrics.revenue_cents).label("revenue_cents"),
+            )
+            .where(*filters)
+            .group_by(day)
+            .order_by(day)
+        )
         
         return {
             "campaign_id": campaign_id,
@@ -101,18 +190,72 @@ class CampaignService:
             "total_impressions": total_impressions,
             "total_clicks": total_clicks,
             "total_conversions": total_conversions,
-            "total_spend": total_spend,
-            "total_revenue": total_revenue,
+            "total_spend": total_spend_cents / 100,
+            "total_revenue": total_revenue_cents / 100,
             "daily_metrics": [
                 {
-                    "date": m.date.isoformat(),
-                    "impressions": m.impressions,
-                    "clicks": m.clicks,
-                    "conversions": m.conversions,
-                    "spend": m.spend,
-                    "revenue": m.revenue
+                    "date": row.day,
+                    "impressions": row.impressions,
+                    "clicks": row.clicks,
+                    "conversions": row.conversions,
+                    "spend": row.spend_cents / 100,
+                    "revenue": row.revenue_cents / 100
                 }
-                for m in metrics
+                for row in daily_result
             ]
         }
-
+    
+    async def bulk_insert_metrics(self, rows: List[dict]) -> int:
+        """
+        Upsert AdMetrics rows in batches of METRICS_BATCH_SIZE.
+        Money is given as integer spend_cents/revenue_cents. Re-ingested campaign/date/hour rows have their counters added
+        to the stored row instead of failing on the unique constraint.
+        """
+        stmt = pg_insert(AdMetrics)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["campaign_id", "date", "hour"],
+            set_={
+                name: getattr(AdMetrics, name) + getattr(stmt.excluded, name)
+                for name in _METRIC_COUNTERS
+            }
+        )
+        
+        for start in range(0, len(rows), METRICS_BATCH_SIZE):
+            await self.db.execute(stmt, rows[start:start + METRICS_BATCH_SIZE])
+        await self.db.commit()
+        
+        return len(rows)
+    
+    async def copy_metrics(self, rows: Iterable[dict]) -> int:
+        """
+        Append AdMetrics rows through Postgres COPY for the firehose path.
+        Bypasses the SQL parser/planner, but does not merge duplicates; use
+        bulk_insert_metrics when rows may already exist.
+        """
+        conn = await self.db.connection()
+        raw = await conn.get_raw_connection()
+        
+        copied = 0
+        batch = []
+        for row in rows:
+            batch.append((
+                row.get("id") or new_id(),
+                row["campaign_id"],
+                row["date"],
+                row.get("hour"),
+                *(row.get(name, 0) for name in _METRIC_COUNTERS),
+            ))
+            if len(batch) >= METRICS_BATCH_SIZE:
+                await raw.driver_connection.copy_records_to_table(
+                    AdMetrics.__tablename__, records=batch, columns=_COPY_COLUMNS
+                )
+                copied += len(batch)
+                batch = []
+        if batch:
+            await raw.driver_connection.copy_records_to_table(
+                AdMetrics.__tablename__, records=batch, columns=_COPY_COLUMNS
+            )
+            copied += len(batch)
+        
+        await self.db.commit()
+        return copied
@@ -1,34 +1,274 @@
 # app/services/targeting_service.py
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Optional, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from ..models.campaign import Campaign
 from ..models.ad_metrics import AdMetrics
 from ..utils.math_utils import calculate_audience_overlap, calculate_targeting_efficiency
 import logging
+import time
+import uuid
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
+# Simulated segment performance used by the targeting analyzers
+
+# (age_group, ctr, cvr, cpc)
+_AGE_PERFORMANCE = (
+    ("18-24", 2.1, 1.8, 0.45),
+    ("25-34", 3.2, 2.4, 0.38),
+    ("35-44", 2.8, 3.1, 0.42),
+    ("45-54", 1.9, 2.2, 0.51),
+    ("55+", 1.5, 1.6, 0.58),
+)
+_AGE_BEST_CTR = max(ctr for _, ctr, _, _ in _AGE_PERFORMANCE)
+
+# (content_type, engagement, completion, ctr)
+_CONTENT_PERFORMANCE = (
+    ("movies", 85, 78, 3.1),
+    ("tv_shows", 92, 82, 3.6),
+    ("documentaries", 76, 88, 2.3),
+    ("sports", 94, 65, 4.2),
+    ("news", 68, 72, 1.8),
+)
+
+# (region, ctr, cpc, market_size)
+_GEO_PERFORMANCE = (
+    ("US-West", 3.2, 0.42, "large"),
+    ("US-East", 2.8, 0.38, "large"),
+    ("US-Central", 2.1, 0.35, "medium"),
+    ("Canada", 2.5, 0.31, "medium"),
+    ("UK", 2.9, 0.45, "medium"),
+)
+
+def _demographic_recommendations() -> List[Dict]:
+    """Build demographic targeting recommendations from the age-group table."""
+    recommendations = []
+    
+    # Performance by age group (simulated)
+    for age_group, ctr, cvr, cpc in _AGE_PERFORMANCE:
+        if ctr >= _AGE_BEST_CTR * 0.9:  # Top 90% performers
+            recommendations.append({
+                "type": "demographic_optimization",
+                "priority": "high",
+                "action": "expand",
+                "target": age_group,
+                "reason": f"High CTR: {ctr}%",
+                "expected_impact": "+15% impressions"
+            })
+        elif ctr < 1.5:  # Poor performers
+            recommendations.append({
+                "type": "demographic_optimization",
+                "priority": "medium",
+                "action": "reduce_or_exclude",
+                "target": age_group,
+                "reason": f"Low CTR: {ctr}%",
+                "expected_impact": "+8% efficiency"
+            })
+    
+    return recommendations
+
+def _content_recommendations() -> List[Dict]:
+    """Build content type recommendations from the content table."""
+    recommendations = []
+    
+    # Simulated content performance data
+    for content_type, engagement, completion, ctr in _CONTENT_PERFORMANCE:
+        if ctr >= 3.5:
+            recommendations.append({
+                "type": "content_optimization",
+                "priority": "high",
+                "action": "increase_budget_allocation",
+                "target": content_type,
+                "reason": f"Excellent CTR: {ctr}%",
+                "expected_impact": "+20% conversions"
+            })
+        elif engagement >= 90:
+            recommendations.append({
+                "type": "content_optimization",
+                "priority": "medium",
+                "action": "expand_targeting",
+                "target": content_type,
+                "reason": f"High engagement: {engagement}%",
+                "expected_impact": "+12% reach"
+            })
+    
+    return recommendations
+
+def _geographic_recommendations() -> List[Dict]:
+    """Build geographic recommendations from the region table."""
+    recommendations = []
+    
+    # Simulated geographic performance
+    for region, ctr, cpc, market_size in _GEO_PERFORMANCE:
+        efficiency_score = ctr / cpc  # CTR per dollar
+        
+        if efficiency_score >= 7.0:
+            recommendations.append({
+                "type": "geographic_optimization",
+                "priority": "high",
+                "action": "increase_budget",
+                "target": region,
+                "reason": f"High efficiency: {efficiency_score:.1f} CTR/$",
+                "expected_impact": "+18% ROI"
+            })
+        elif market_size == "large" and ctr < 2.5:
+            recommendations.append({
+                "type": "geographic_optimization",
+                "priority": "medium",
+                "action": "optimize_creative",
+                "target": region,
+                "reason": f"Large market underperforming: {ctr}% CTR",
+                "expected_impact": "+10% performance"
+            })
+    
+    return recommendations
+
+_DEMOGRAPHIC_RECS = _demographic_recommendations()
+_CONTENT_RECS = _content_recommendations()
+_GEO_RECS = _geographic_recommendations()
+
+_EXPANSION_RECS = (
+    # Lookalike audience opportunities
+    {
+        "type": "audience_expansion",
+        "priority": "high",
+        "action": "create_lookalike",
+        "target": "high_value_converters",
+        "reason": "Based on top 10% of converters",
+        "expected_impact": "+25% qualified reach"
+    },
+    # Similar content audiences
+    {
+        "type": "audience_expansion",
+        "priority": "medium",
+        "action": "add_similar_interests",
+        "target": "disney_enthusiasts",
+        "reason": "High affinity with Disney content",
+        "expected_impact": "+15% engagement"
+    },
+    # Cross-platform opportunities
+    {
+        "type": "audience_expansion",
+        "priority": "medium",
+        "action": "expand_platforms",
+        "target": "mobile_first_users",
+        "reason": "Growing mobile viewership",
+        "expected_impact": "+20% reach"
+    },
+)
+
+def _targeting_recommendations(industry: str, objective: str) -> Dict:
+    """Targeting recommendations for a lowercased industry and objective."""
+    recommendations = {
+        "suggested_demographics": [],
+        "suggested_content_types": [],
+        "suggested_regions": [],
+        "budget_allocation": {},
+        "best_practices": []
+    }
+    
+    # Industry-specific recommendations
+    if industry in ["entertainment", "media"]:
+        recommendations["suggested_demographics"] = ["18-34", "25-44"]
+        recommendations["suggested_content_types"] = ["movies", "tv_shows"]
+        recommendations["best_practices"].append("Focus on premium content slots")
+    
+    elif industry in ["technology", "gaming"]:
+        recommendations["suggested_demographics"] = ["18-35", "25-40"]
+        recommendations["suggested_content_types"] = ["documentaries", "sports"]
+        recommendations["best_practices"].append("Target tech-savvy audiences")
+    
+    elif industry in ["automotive", "travel"]:
+        recommendations["suggested_demographics"] = ["25-54"]
+        recommendations["suggested_content_types"] = ["documentaries", "sports", "news"]
+        recommendations["best_practices"].append("Emphasize aspirational content")
+    
+    # Objective-specific recommendations
+    if objective == "awareness":
+        recommendations["budget_allocation"] = {
+            "video_ads": 60,
+            "display_ads": 30,
+            "interactive_ads": 10
+        }
+        recommendations["best_practices"].append("Prioritize reach over frequency")
+    
+    elif objective == "conversion":
+        recommendations["budget_allocation"] = {
+            "video_ads": 40,
+            "display_ads": 35,
+            "interactive_ads": 25
+        }
+        recommendations["best_practices"].append("Focus on high-intent audiences")
+    
+    return recommendations
+
 class TargetingService:
     """
     Advanced targeting service for Disney Streaming campaigns.
     Handles audience segmentation, demographic targeting, and optimization.
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def optimize_targeting(self, campaign_id: str) -> Dict:
+    async def optimize_targeting(self, campaign_id: str) -> Dict:
         """
         Analyze campaign performance and suggest targeting optimizations.
         """
-        campaign = self.db.query(Campaign).filter(Campaign.id == campaign_id).first()
+        campaign = await self.db.get(Campaign, campaign_id)
         if not campaign:
             return {"error": "Campaign not found"}
         
         # Get performance data
-        metrics = self._get_campaign_metrics(campaign_id)
-        if not metrics:
+        metrics = await self._get_campaign_metrics(campaign_id)
+        return self._build_optimization(campaign_id, campaign, metrics)
+    
+    async def optimize_targeting_bulk(self, campaign_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Targeting optimizations for several campaigns, keyed by campaign id.
+        Loads all campaigns in one query and all metric summaries in one
+        GROUP BY query instead of two round-trips per campaign.
+        """
+        # Malformed ids cannot match a campaign; report them as not found
+        # rather than failing the whole batch
+        ids = []
+        results = {}
+        for campaign_id in campaign_ids:
+            try:
+                ids.append(uuid.UUID(str(campaign_id)))
+            except ValueError:
+                results[str(campaign_id)] = {"error": "Campaign not found"}
+        
+        campaigns = {
+            campaign.id: campaign
+            for campaign in await self.db.scalars(select(Campaign).where(Campaign.id.in_(ids)))
+        }
+        metrics_result = await self.db.execute(
+            self._metrics_summary_query(AdMetrics.campaign_id)
+            .where(AdMetrics.campaign_id.in_(ids))
+            .group_by(AdMetrics.campaign_id)
+        )
+        metrics_by_campaign = {row.campaign_id: row for row in metrics_result}
+        
+        for campaign_id in ids:
+            campaign = campaigns.get(campaign_id)
+            if not campaign:
+                results[str(campaign_id)] = {"error": "Campaign not found"}
+                continue
+            # Campaigns without recent rows have no group; treat as no data
+            metrics = metrics_by_campaign.get(campaign_id)
+            results[str(campaign_id)] = self._build_optimization(
+                str(campaign_id), campaign, metrics
+            )
+        
+        return results
+    
+    def _build_optimization(self, campaign_id: str, campaign: Campaign, metrics: Optional[Row]) -> Dict:
+        """Assemble the optimization report for a campaign and its metric summary."""
+        if metrics is None or not metrics.days:
             return {"error": "Insufficient performance data"}
         
         # Analyze current targeting
@@ -69,173 +309,66 @@ class TargetingService:
             "optimization_score": self._calculate_optimization_score(recommendations)
         }
     
-    def _get_campaign_metrics(self, campaign_id: str) -> List[AdMetrics]:
-        """Get recent campaign metrics for analysis."""
+    async def _get_campaign_metrics(self, campaign_id: str) -> Row:
+        """
+        Get recent campaign metrics for analysis, aggregated in the database.
+        Returns a single row of totals plus the number of days with data.
+        """
+        result = await self.db.execute(
+            self._metrics_summary_query().where(AdMetrics.campaign_id == campaign_id)
+        )
+        return result.one()
+    
+    def _metrics_summary_query(self, *group_columns) -> Select:
+        """Aggregate select over the last 30 days of metrics, selecting group_columns first."""
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=30)
         
-        return self.db.query(AdMetrics).filter(
-            AdMetrics.campaign_id == campaign_id,
-            AdMetrics.date >= start_date,
-            AdMetrics.date <= end_date
-        ).all()
+        return select(
+            *group_columns,
+            func.coalesce(func.sum(AdMetrics.impressions), 0).label("impressions"),
+            func.coalesce(func.sum(AdMetrics.clicks), 0).label("clicks"),
+            func.coalesce(func.sum(AdMetrics.conversions), 0).label("conversions"),
+            func.coalesce(func.sum(AdMetrics.spend_cents), 0).label("spend_cents"),
+            func.count(func.distinct(func.date_trunc("day", AdMetrics.date))).label("days")
+        ).where(
+            # Callers add the campaign_id predicate; together with this range
+            # it is a range scan on the (campaign_id, date, hour) unique index
+            AdMetrics.date.between(start_date, end_date)
+        )
     
-    def _analyze_demographic_performance(self, campaign_id: str, metrics: List[AdMetrics]) -> List[Dict]:
+    def _analyze_demographic_performance(self, campaign_id: str, metrics: Row) -> List[Dict]:
         """Analyze demographic targeting performance."""
-        recommendations = []
-        
-        # Calculate performance by age group (simulated)
-        age_performance = {
-            "18-24": {"ctr": 2.1, "cvr": 1.8, "cpc": 0.45},
-            "25-34": {"ctr": 3.2, "cvr": 2.4, "cpc": 0.38},
-            "35-44": {"ctr": 2.8, "cvr": 3.1, "cpc": 0.42},
-            "45-54": {"ctr": 1.9, "cvr": 2.2, "cpc": 0.51},
-            "55+": {"ctr": 1.5, "cvr": 1.6, "cpc": 0.58}
-        }
-        
-        # Find best performing demographics
-        best_ctr = max(age_performance.values(), key=lambda x: x["ctr"])
-        best_cvr = max(age_performance.values(), key=lambda x: x["cvr"])
-        
-        for age_group, perf in age_performance.items():
-            if perf["ctr"] >= best_ctr["ctr"] * 0.9:  # Top 90% performers
-                recommendations.append({
-                    "type": "demographic_optimization",
-                    "priority": "high",
-                    "action": "expand",
-                    "target": age_group,
-                    "reason": f"High CTR: {perf['ctr']}%",
-                    "expected_impact": "+15% impressions"
-                })
-            elif perf["ctr"] < 1.5:  # Poor performers
-                recommendations.append({
-                    "type": "demographic_optimization",
-                    "priority": "medium",
-                    "action": "reduce_or_exclude",
-                    "target": age_group,
-                    "reason": f"Low CTR: {perf['ctr']}%",
-                    "expected_impact": "+8% efficiency"
-                })
-        
-        return recommendations
+        # Driven only by the static segment table today, so precomputed at import;
+        # callers get their own copies so annotating one never leaks into the next
+        return [dict(rec) for rec in _DEMOGRAPHIC_RECS]
     
-    def _analyze_content_performance(self, campaign_id: str, metrics: List[AdMetrics]) -> List[Dict]:
+    def _analyze_content_performance(self, campaign_id: str, metrics: Row) -> List[Dict]:
         """Analyze content type targeting performance."""
-        recommendations = []
-        
-        # Simulated content performance data
-        content_performance = {
-            "movies": {"engagement": 85, "completion": 78, "ctr": 3.1},
-            "tv_shows": {"engagement": 92, "completion": 82, "ctr": 3.6},
-            "documentaries": {"engagement": 76, "completion": 88, "ctr": 2.3},
-            "sports": {"engagement": 94, "completion": 65, "ctr": 4.2},
-            "news": {"engagement": 68, "completion": 72, "ctr": 1.8}
-        }
-        
-        for content_type, perf in content_performance.items():
-            if perf["ctr"] >= 3.5:
-                recommendations.append({
-                    "type": "content_optimization",
-                    "priority": "high",
-                    "action": "increase_budget_allocation",
-                    "target": content_type,
-                    "reason": f"Excellent CTR: {perf['ctr']}%",
-                    "expected_impact": "+20% conversions"
-                })
-            elif perf["engagement"] >= 90:
-                recommendations.append({
-                    "type": "content_optimization",
-                    "priority": "medium",
-                    "action": "expand_targeting",
-                    "target": content_type,
-                    "reason": f"High engagement: {perf['engagement']}%",
-                    "expected_impact": "+12% reach"
-                })
-        
-        return recommendations
+        # Driven only by the static segment table today, so precomputed at import;
+        # callers get their own copies so annotating one never leaks into the next
+        return [dict(rec) for rec in _CONTENT_RECS]
     
-    def _analyze_geographic_performance(self, campaign_id: str, metrics: List[AdMetrics]) -> List[Dict]:
+    def _analyze_geographic_performance(self, campaign_id: str, metrics: Row) -> List[Dict]:
         """Analyze geographic targeting performance."""
-        recommendations = []
-        
-        # Simulated geographic performance
-        geo_performance = {
-            "US-West": {"ctr": 3.2, "cpc": 0.42, "market_size": "large"},
-            "US-East": {"ctr": 2.8, "cpc": 0.38, "market_size": "large"},
-            "US-Central": {"ctr": 2.1, "cpc": 0.35, "market_size": "medium"},
-            "Canada": {"ctr": 2.5, "cpc": 0.31, "market_size": "medium"},
-            "UK": {"ctr": 2.9, "cpc": 0.45, "market_size": "medium"}
-        }
-        
-        for region, perf in geo_performance.items():
-            efficiency_score = perf["ctr"] / perf["cpc"]  # CTR per dollar
-            
-            if efficiency_score >= 7.0:
-                recommendations.append({
-                    "type": "geographic_optimization",
-                    "priority": "high",
-                    "action": "increase_budget",
-                    "target": region,
-                    "reason": f"High efficiency: {efficiency_score:.1f} CTR/$",
-                    "expected_impact": "+18% ROI"
-                })
-            elif perf["market_size"] == "large" and perf["ctr"] < 2.5:
-                recommendations.append({
-                    "type": "geographic_optimization",
-                    "priority": "medium",
-                    "action": "optimize_creative",
-                    "target": region,
-                    "reason": f"Large market underperforming: {perf['ctr']}% CTR",
-                    "expected_impact": "+10% performance"
-                })
-        
-        return recommendations
+        # Driven only by the static segment table today, so precomputed at import;
+        # callers get their own copies so annotating one never leaks into the next
+        return [dict(rec) for rec in _GEO_RECS]
     
     def _identify_expansion_opportunities(self, campaign_id: str) -> List[Dict]:
         """Identify audience expansion opportunities."""
-        recommendations = []
-        
-        # Lookalike audience opportunities
-        recommendations.append({
-            "type": "audience_expansion",
-            "priority": "high",
-            "action": "create_lookalike",
-            "target": "high_value_converters",
-            "reason": "Based on top 10% of converters",
-            "expected_impact": "+25% qualified reach"
-        })
-        
-        # Similar content audiences
-        recommendations.append({
-            "type": "audience_expansion",
-            "priority": "medium",
-            "action": "add_similar_interests",
-            "target": "disney_enthusiasts",
-            "reason": "High affinity with Disney content",
-            "expected_impact": "+15% engagement"
-        })
-        
-        # Cross-platform opportunities
-        recommendations.append({
-            "type": "audience_expansion",
-            "priority": "medium",
-            "action": "expand_platforms",
-            "target": "mobile_first_users",
-            "reason": "Growing mobile viewership",
-            "expected_impact": "+20% reach"
-        })
-        
-        return recommendations
+        # Same for every campaign today, so built once at import; copied per call
+        return [dict(rec) for rec in _EXPANSION_RECS]
     
-    def _summarize_performance(self, metrics: List[AdMetrics]) -> Dict:
+    def _summarize_performance(self, metrics: Row) -> Dict:
         """Summarize campaign performance metrics."""
-        if not metrics:
+        if not metrics.days:
             return {}
         
-        total_impressions = sum(m.impressions for m in metrics)
-        total_clicks = sum(m.clicks for m in metrics)
-        total_conversions = sum(m.conversions for m in metrics)
-        total_spend = sum(m.spend for m in metrics)
+        total_impressions = metrics.impressions
+        total_clicks = metrics.clicks
+        total_conversions = metrics.conversions
+        total_spend = metrics.spend_cents / 100
         
         return {
             "total_impressions": total_impressions,
@@ -245,7 +378,7 @@ class TargetingService:
             "ctr": (total_clicks / total_impressions * 100) if total_impressions > 0 else 0,
             "cvr": (total_conversions / total_clicks * 100) if total_clicks > 0 else 0,
             "cpc": (total_spend / total_clicks) if total_clicks > 0 else 0,
-            "days_analyzed": len(set(m.date.date() for m in metrics))
+            "days_analyzed": metrics.days
         }
     
     def _calculate_optimization_score(self, recommendations: List[Dict]) -> float:
@@ -253,8 +386,9 @@ class TargetingService:
         if not recommendations:
             return 100.0  # Already optimized
         
-        priority_weights = {"high": 3, "medium": 2, "low": 1}
-        total_weight = sum(priority_weights.get(r["priority"], 1) for r in recommendations)
+        # Weights: high 3, medium 2, anything else 1
+        counts = Counter(r["priority"] for r in recommendations)
+        total_weight = len(recommendations) + counts["high"] * 2 + counts["medium"]
         
         # Score decreases with more high-priority recommendations
         optimization_score = max(0, 100 - (total_weight * 5))
@@ -263,13 +397,16 @@ class TargetingService:
     
     def create_audience_segment(self, segment_data: Dict) -> Dict:
         """Create a new audience segment for targeting."""
+        # One clock read for both fields; nanoseconds keep ids from colliding
+        # within the same second
+        now_ns = time.time_ns()
         segment = {
-            "id": f"segment_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
+            "id": f"segment_{now_ns}",
             "name": segment_data.get("name"),
             "description": segment_data.get("description"),
             "criteria": segment_data.get("criteria", {}),
             "estimated_size": self._estimate_audience_size(segment_data.get("criteria", {})),
-            "created_at": datetime.utcnow().isoformat(),
+            "created_at": datetime.fromtimestamp(now_ns / 1e9, tz=timezone.utc).isoformat(),
             "status": "active"
         }
         
@@ -277,66 +414,19 @@ class TargetingService:
     
     def _estimate_audience_size(self, criteria: Dict) -> int:
         """Estimate audience size based on targeting criteria."""
-        base_size = 100000000  # Disney+ has ~100M subscribers
-        
-        # Apply demographic filters
+        # Each present filter narrows the ~100M Disney+ subscriber base by the
+        # share of its options selected (5 age groups, 10 regions, 5 content
+        # types; content interest is more specific, hence the extra 0.8)
+        factor = 1.0
         if "age_groups" in criteria:
-            age_reduction = len(criteria["age_groups"]) / 5  # 5 total age groups
-            base_size = int(base_size * age_reduction)
-        
-        # Apply geographic filters
+            factor *= len(criteria["age_groups"]) / 5
         if "regions" in criteria:
-            geo_reduction = len(criteria["regions"]) / 10  # Assume 10 major regions
-            base_size = int(base_size * geo_reduction)
-        
-        # Apply content interest filters
+            factor *= len(criteria["regions"]) / 10
         if "content_types" in criteria:
-            content_reduction = len(criteria["content_types"]) / 5  # 5 content types
-            base_size = int(base_size * content_reduction * 0.8)  # More specific
+            factor *= len(criteria["content_types"]) / 5 * 0.8
         
-        return max(10000, base_size)  # Minimum viable audience
+        return max(10000, int(100000000 * factor))  # Minimum viable audience
     
     def get_targeting_recommendations(self, advertiser_industry: str, campaign_objective: str) -> Dict:
         """Get targeting recommendations based on industry and objective."""
-        recommendations = {
-            "suggested_demographics": [],
-            "suggested_content_types": [],
-            "suggested_regions": [],
-            "budget_allocation": {},
-            "best_practices": []
-        }
-        
-        # Industry-specific recommendations
-        if advertiser_industry.lower() in ["entertainment", "media"]:
-            recommendations["suggested_demographics"] = ["18-34", "25-44"]
-            recommendations["suggested_content_types"] = ["movies", "tv_shows"]
-            recommendations["best_practices"].append("Focus on premium content slots")
-        
-        elif advertiser_industry.lower() in ["technology", "gaming"]:
-            recommendations["suggested_demographics"] = ["18-35", "25-40"]
-            recommendations["suggested_content_types"] = ["documentaries", "sports"]
-            recommendations["best_practices"].append("Target tech-savvy audiences")
-        
-        elif advertiser_industry.lower() in ["automotive", "travel"]:
-            recommendations["suggested_demographics"] = ["25-54"]
-            recommendations["suggested_content_types"] = ["documentaries", "sports", "news"]
-            recommendations["best_practices"].append("Emphasize aspirational content")
-        
-        # Objective-specific recommendations
-        if campaign_objective == "awareness":
-            recommendations["budget_allocation"] = {
-                "video_ads": 60,
-                "display_ads": 30,
-                "interactive_ads": 10
-            }
-            recommendations["best_practices"].append("Prioritize reach over frequency")
-        
-        elif campaign_objective == "conversion":
-            recommendations["budget_allocation"] = {
-                "video_ads": 40,
-                "display_ads": 35,
-                "interactive_ads": 25
-            }
-            recommendations["best_practices"].append("Focus on high-intent audiences")
-        
-        return recommendations
\ No newline at end of file
+        return _targeting_recommendations(advertiser_industry.lower(), campaign_objective)
\ No newline at end of file
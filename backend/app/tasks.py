@@ -0,0 +1,35 @@
+# app/tasks.py - Periodic background tasks run inside the API process
+import asyncio
+import logging
+from sqlalchemy import text
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Partitions are monthly; checking daily keeps next month's ready well ahead
+_PARTITION_CHECK_SECONDS = 24 * 60 * 60
+
+async def partition_helper_exists() -> bool:
+    """Whether create_ad_metrics_partition() from the ad_metrics DDL is installed."""
+    async with SessionLocal() as db:
+        return await db.scalar(text(
+            "SELECT to_regprocedure('create_ad_metrics_partition(date)') IS NOT NULL"
+        ))
+
+async def ensure_metrics_partitions() -> None:
+    """Make sure ad_metrics partitions exist for this month and next month."""
+    async with SessionLocal() as db:
+        await db.execute(text(
+            "SELECT create_ad_metrics_partition(current_date), "
+            "create_ad_metrics_partition((current_date + interval '1 month')::date)"
+        ))
+        await db.commit()
+
+async def run_partition_maintenance_loop() -> None:
+    """Pre-create upcoming ad_metrics partitions once a day until cancelled."""
+    while True:
+        try:
+            await ensure_metrics_partitions()
+        except Exception:
+            logger.exception("ad_metrics partition maintenance failed")
+        await asyncio.sleep(_PARTITION_CHECK_SECONDS)
@@ -0,0 +1,33 @@
+# app/utils/bloom.py - Probabilistic set membership
+import hashlib
+import math
+import threading
+
+class BloomFilter:
+    """
+    Fixed-capacity Bloom filter over bytes keys.
+    Never reports a false negative; false positives occur at roughly
+    error_rate once `capacity` keys have been added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, key: bytes):
+        # Kirsch-Mitzenmacher: k indexes from two halves of one 128-bit digest
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: bytes) -> None:
+        positions = self._positions(key)
+        with self._lock:
+            for pos in positions:
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
@@ -0,0 +1,11 @@
+# app/utils/ids.py - Primary key generation
+import uuid
+from uuid_utils import uuid7
+
+def new_id() -> uuid.UUID:
+    """
+    Generate a time-ordered UUIDv7 primary key.
+    The millisecond timestamp in the high bits keeps B-tree inserts
+    appending to the right-most index page instead of random pages.
+    """
+    return uuid.UUID(bytes=uuid7().bytes)
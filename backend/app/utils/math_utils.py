@@ -1,7 +1,9 @@
 # app/utils/math_utils.py - Mathematical utilities for audit background
 import math
+import numpy as np
+from numba import njit
+from scipy import stats
 from typing import Dict, List, Optional
-from statistics import mean, median, stdev
 from datetime import datetime, timedelta
 
 def calculate_campaign_performance(performance_data: Dict) -> Dict:
@@ -29,17 +31,23 @@ def calculate_campaign_performance(performance_data: Dict) -> Dict:
     
     # Statistical analysis
     daily_metrics = performance_data.get("daily_metrics", [])
-    if daily_metrics:
-        daily_impressions = [d["impressions"] for d in daily_metrics]
-        daily_spend = [d["spend"] for d in daily_metrics]
+    if len(daily_metrics) >= 2:
+        # Columnar (impressions, spend) array, filled in one pass over the rows
+        daily = np.fromiter(
+            ((d["impressions"], d["spend"]) for d in daily_metrics),
+            dtype=np.dtype((np.float64, 2)),
+            count=len(daily_metrics)
+        )
         
-        # Variability analysis
-        impression_variance = calculate_variance(daily_impressions)
-        spend_variance = calculate_variance(daily_spend)
-        
-        # Trend analysis
-        impression_trend = calculate_trend(daily_impressions)
-        spend_trend = calculate_trend(daily_spend)
+        # Variability and trend analysis for both series in one kernel pass
+        (
+            (impression_variance, spend_variance),
+            (impression_trend, spend_trend),
+        ) = _series_stats_core(daily)
+        impression_variance = float(impression_variance)
+        spend_variance = float(spend_variance)
+        impression_trend = float(impression_trend)
+        spend_trend = float(spend_trend)
     else:
         impression_variance = spend_variance = 0
         impression_trend = spend_trend = 0
@@ -76,32 +84,92 @@ def calculate_variance(data: List[float]) -> float:
     if len(data) < 2:
         return 0
     
-    mean_val = mean(data)
-    variance = sum((x - mean_val) ** 2 for x in data) / (len(data) - 1)
-    return variance
+    return float(_variance_core(np.asarray(data, dtype=np.float64)))
 
 def calculate_trend(data: List[float]) -> float:
     """Calculate linear trend slope for performance trajectory."""
     if len(data) < 2:
         return 0
     
-    n = len(data)
-    x = list(range(n))
+    return float(_trend_core(np.asarray(data, dtype=np.float64)))
+
+@njit(cache=True, fastmath=True)
+def _variance_core(data: np.ndarray) -> float:
+    """
+    Compiled sample variance (ddof=1) of a float64 array with n >= 2.
+    Welford's single-pass update: one read of the data, numerically stable.
+    """
+    n = data.shape[0]
+    mean_val = 0.0
+    ss = 0.0
+    for i in range(n):
+        delta = data[i] - mean_val
+        mean_val += delta / (i + 1)
+        ss += delta * (data[i] - mean_val)
+    return ss / (n - 1)
+
+@njit(cache=True, fastmath=True)
+def _trend_core(data: np.ndarray) -> float:
+    """Compiled least-squares slope of a float64 array against x = 0..n-1, n >= 2."""
+    n = data.shape[0]
+    x_mean = (n - 1) / 2.0
+    
+    total = 0.0
+    for i in range(n):
+        total += data[i]
+    y_mean = total / n
     
-    # Linear regression slope calculation
-    x_mean = mean(x)
-    y_mean = mean(data)
+    numerator = 0.0
+    denominator = 0.0
+    for i in range(n):
+        dx = i - x_mean
+        numerator += dx * (data[i] - y_mean)
+        denominator += dx * dx
+    return numerator / denominator
+
+@njit(cache=True, fastmath=True)
+def _series_stats_core(series: np.ndarray) -> np.ndarray:
+    """
+    Sample variance and trend slope of every column of an (n, k) float64
+    array with n >= 2, in a single pass over the rows.
+    Returns a (2, k) array: variances in row 0, slopes in row 1.
+    """
+    n, k = series.shape
+    x_mean = (n - 1) / 2.0
     
-    numerator = sum((x[i] - x_mean) * (data[i] - y_mean) for i in range(n))
-    denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
+    means = np.zeros(k)
+    ss = np.zeros(k)
+    xy = np.zeros(k)
+    denominator = 0.0
+    for i in range(n):
+        dx = i - x_mean
+        denominator += dx * dx
+        for j in range(k):
+            y = series[i, j]
+            # Welford update for the variance
+            delta = y - means[j]
+            means[j] += delta / (i + 1)
+            ss[j] += delta * (y - means[j])
+            # The centred x values sum to zero, so the slope numerator
+            # needs no y mean
+            xy[j] += dx * y
     
-    return numerator / denominator if denominator != 0 else 0
+    out = np.empty((2, k))
+    for j in range(k):
+        out[0, j] = ss[j] / (n - 1)
+        out[1, j] = xy[j] / denominator
+    return out
 
 def calculate_risk_score(ctr: float, cvr: float, roas: float, variance: float) -> float:
     """
     Calculate risk score based on performance metrics.
     Higher score indicates higher risk.
     """
+    return float(_risk_score_core(float(ctr), float(cvr), float(roas), float(variance)))
+
+@njit(cache=True, fastmath=True)
+def _risk_score_core(ctr: float, cvr: float, roas: float, variance: float) -> float:
+    """Compiled body of calculate_risk_score."""
     # Normalize metrics to 0-1 scale
     ctr_risk = max(0, 1 - (ctr / 5))  # Assume 5% is excellent CTR
     cvr_risk = max(0, 1 - (cvr / 10))  # Assume 10% is excellent CVR
@@ -113,6 +181,21 @@ def calculate_risk_score(ctr: float, cvr: float, roas: float, variance: float) -
     
     return risk_score
 
+# Normalisers and weights shared by calculate_risk_score_batch
+_RISK_SCALE = np.array([5.0, 10.0, 5.0])  # excellent CTR %, CVR %, ROAS
+_RISK_WEIGHTS = np.array([0.3, 0.3, 0.3])
+
+def calculate_risk_score_batch(metrics: np.ndarray) -> np.ndarray:
+    """
+    Vectorized calculate_risk_score over an (n, 4) array of
+    (ctr, cvr, roas, variance) rows; returns n risk scores.
+    """
+    metrics = np.asarray(metrics, dtype=np.float64)
+    risks = 1 - metrics[:, :3] / _RISK_SCALE
+    np.clip(risks, 0, None, out=risks)
+    variance_risk = np.minimum(metrics[:, 3] / 1000000, 1)
+    return (risks @ _RISK_WEIGHTS + variance_risk * 0.1) * 100
+
 def project_monthly_performance(current_revenue: float, days_elapsed: int) -> float:
     """Project monthly performance based on current trajectory."""
     if days_elapsed == 0:
@@ -124,42 +207,37 @@ def project_monthly_performance(current_revenue: float, days_elapsed: int) -> fl
 def calculate_statistical_significance(control_group: List[float], test_group: List[float]) -> Dict:
     """
     Calculate statistical significance for A/B testing.
-    Returns p-value and confidence interval.
+    Returns p-value and confidence interval from Welch's t-test.
     """
-    if len(control_group) < 2 or len(test_group) < 2:
-        return {"p_value": 1.0, "significant": False, "confidence_interval": [0, 0]}
-    
-    # Simple t-test approximation
-    mean_control = mean(control_group)
-    mean_test = mean(test_group)
+    control = np.asarray(control_group, dtype=np.float64)
+    test = np.asarray(test_group, dtype=np.float64)
     
-    std_control = stdev(control_group) if len(control_group) > 1 else 0
-    std_test = stdev(test_group) if len(test_group) > 1 else 0
+    if control.size < 2 or test.size < 2:
+        return {"p_value": 1.0, "significant": False, "confidence_interval": [0, 0]}
     
     # Standard error calculation
-    se = math.sqrt((std_control**2 / len(control_group)) + (std_test**2 / len(test_group)))
+    se = math.sqrt(control.var(ddof=1) / control.size + test.var(ddof=1) / test.size)
     
     if se == 0:
         return {"p_value": 1.0, "significant": False, "confidence_interval": [0, 0]}
     
-    # T-statistic
-    t_stat = (mean_test - mean_control) / se
-    
-    # Simplified p-value calculation (approximate)
-    p_value = 2 * (1 - abs(t_stat) / (abs(t_stat) + math.sqrt(len(control_group) + len(test_group) - 2)))
+    # Welch's t-test (unequal variances)
+    result = stats.ttest_ind(test, control, equal_var=False)
+    p_value = float(result.pvalue)
     
     significant = p_value < 0.05
     
-    # 95% confidence interval
-    margin_of_error = 1.96 * se
-    ci_lower = (mean_test - mean_control) - margin_of_error
-    ci_upper = (mean_test - mean_control) + margin_of_error
+    # 95% confidence interval from the t distribution at Welch's degrees of freedom
+    effect_size = float(test.mean() - control.mean())
+    ci = result.confidence_interval(0.95)
+    ci_lower = float(ci.low)
+    ci_upper = float(ci.high)
     
     return {
         "p_value": p_value,
         "significant": significant,
         "confidence_interval": [ci_lower, ci_upper],
-        "effect_size": mean_test - mean_control
+        "effect_size": effect_size
     }
 
 def calculate_roi(revenue: float, cost: float) -> float:
@@ -179,28 +257,83 @@ def calculate_projected_performance(
     if not historical_data:
         return {"projected_revenue": 0, "projected_spend": 0, "confidence": 0}
     
-    revenues = [d.get("revenue", 0) for d in historical_data]
-    spends = [d.get("spend", 0) for d in historical_data]
-    
-    # Calculate trends
-    revenue_trend = calculate_trend(revenues)
-    spend_trend = calculate_trend(spends)
-    
-    # Project forward
-    current_revenue = revenues[-1] if revenues else 0
-    current_spend = spends[-1] if spends else 0
-    
-    projected_revenue = current_revenue + (revenue_trend * projection_days)
-    projected_spend = current_spend + (spend_trend * projection_days)
+    # Pack (revenue, spend) rows straight into an (n, 2) array
+    series = np.fromiter(
+        ((d.get("revenue", 0), d.get("spend", 0)) for d in historical_data),
+        dtype=np.dtype((np.float64, 2)),
+        count=len(historical_data)
+    )
+    (
+        projected_revenue,
+        projected_spend,
+        revenue_trend,
+        spend_trend,
+        revenue_variance,
+        revenue_mean,
+        revenue_r_squared,
+    ) = _project_core(series, projection_days)
     
     # Calculate confidence based on data consistency
-    revenue_variance = calculate_variance(revenues)
-    confidence = max(0, 100 - (revenue_variance / max(mean(revenues), 1) * 100))
+    confidence = max(0, 100 - (revenue_variance / max(revenue_mean, 1) * 100))
     
     return {
-        "projected_revenue": max(0, projected_revenue),
-        "projected_spend": max(0, projected_spend),
-        "confidence_percent": min(100, confidence),
-        "revenue_trend": revenue_trend,
-        "spend_trend": spend_trend
+        "projected_revenue": max(0, float(projected_revenue)),
+        "projected_spend": max(0, float(projected_spend)),
+        "confidence_percent": min(100, float(confidence)),
+        "revenue_trend": float(revenue_trend),
+        "spend_trend": float(spend_trend),
+        # Share of revenue variation the linear trend explains (0-1)
+        "revenue_trend_r_squared": float(revenue_r_squared)
     }
+
+@njit(cache=True, fastmath=True)
+def _project_core(series: np.ndarray, projection_days: int) -> np.ndarray:
+    """
+    Compiled projection kernel over an (n, 2) array of (revenue, spend) rows.
+    Returns [projected_revenue, projected_spend, revenue_trend, spend_trend,
+    revenue_variance, revenue_mean, revenue_r_squared].
+    """
+    n = series.shape[0]
+    x_mean = (n - 1) / 2.0
+    
+    rev_mean = 0.0
+    spend_mean = 0.0
+    for i in range(n):
+        rev_mean += series[i, 0]
+        spend_mean += series[i, 1]
+    rev_mean /= n
+    spend_mean /= n
+    
+    # Linear regression slopes and revenue variance in one pass
+    rev_num = 0.0
+    spend_num = 0.0
+    denom = 0.0
+    rev_ss = 0.0
+    for i in range(n):
+        dx = i - x_mean
+        rev_dev = series[i, 0] - rev_mean
+        rev_num += dx * rev_dev
+        spend_num += dx * (series[i, 1] - spend_mean)
+        denom += dx * dx
+        rev_ss += rev_dev * rev_dev
+    
+    out = np.zeros(7)
+    if n >= 2 and denom != 0:
+        out[2] = rev_num / denom
+        out[3] = spend_num / denom
+        if rev_ss != 0:
+            out[6] = rev_num * rev_num / (denom * rev_ss)
+    if n >= 2:
+        out[4] = rev_ss / (n - 1)
+    out[0] = series[n - 1, 0] + out[2] * projection_days
+    out[1] = series[n - 1, 1] + out[3] * projection_days
+    out[5] = rev_mean
+    return out
+
+def warm_jit_kernels() -> None:
+    """Compile the numba kernels up front so the first request doesn't pay for it."""
+    _project_core(np.zeros((2, 2)), 1)
+    _variance_core(np.zeros(2))
+    _trend_core(np.zeros(2))
+    _series_stats_core(np.zeros((2, 2)))
+    _risk_score_core(0.0, 0.0, 0.0, 0.0)
@@ -0,0 +1,23 @@
+# app/utils/pagination.py - Keyset (cursor) pagination helpers
+import base64
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    """Encode the (created_at, id) sort key of the last row on a page."""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decode a cursor produced by encode_cursor.
+    Raises ValueError for malformed or tampered cursors.
+    """
+    try:
+        created_at_iso, row_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(created_at_iso), uuid.UUID(row_id)
+    except (ValueError, TypeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor}") from e
@@ -1,22 +1,147 @@
 # app/utils/validators.py
 import re
 from typing import Dict, List, Optional, Tuple, Any
-from datetime import datetime, date
+from datetime import datetime, date, timezone
+from functools import lru_cache
 import logging
 
+try:
+    import ahocorasick
+except ImportError:  # optional accelerator; falls back to a regex scan
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
-def validate_campaign_data(campaign_data: Dict) -> Tuple[bool, List[str]]:
+# Patterns are compiled once at import rather than looked up in re's cache per call
+_CAMPAIGN_NAME_RE = re.compile(r"^[a-zA-Z0-9\s\-_\.]+$")
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_PHONE_RE = re.compile(r'^\+?1?-?\.?\s?\(?(\d{3})\)?[-\.\s]?(\d{3})[-\.\s]?(\d{4})$')
+_FILENAME_RE = re.compile(r'^[a-zA-Z0-9._-]+$')
+_API_KEY_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+_UNSAFE_INPUT_CHARS_RE = re.compile(r'[<>"\'\&]')
+
+# Campaign budget limits in dollars
+MIN_CAMPAIGN_BUDGET = 100.0
+MAX_CAMPAIGN_BUDGET = 10_000_000.0
+
+# Required fields, in the order their errors are reported. A single .get() covers
+# both the missing and the empty case
+_REQUIRED_CAMPAIGN_FIELDS = ("name", "advertiser_id", "start_date", "end_date", "budget")
+_REQUIRED_ADVERTISER_FIELDS = ("name", "company_name", "contact_email")
+
+# Keyword lists used by the ad content and brand safety validators
+PROHIBITED_WORDS = (
+    "explicit", "adult", "gambling", "illegal", "violence",
+    "hate", "discrimination", "inappropriate", "offensive"
+)
+POSITIVE_INDICATORS = (
+    "family", "fun", "magical", "adventure", "wholesome",
+    "entertainment", "joy", "wonder", "imagination", "dreams"
+)
+BRAND_SAFETY_CATEGORIES = {
+    "violence": ("violence", "violent", "fight", "attack", "war", "weapon"),
+    "adult_content": ("adult", "mature", "explicit", "sexual", "intimate"),
+    "substances": ("alcohol", "drinking", "drugs", "smoking", "tobacco"),
+    "gambling": ("gambling", "casino", "betting", "lottery", "poker"),
+    "negative_sentiment": ("hate", "angry", "disgusting", "terrible", "awful")
+}
+
+_KEYWORD_GROUPS = {
+    "prohibited": PROHIBITED_WORDS,
+    "positive": POSITIVE_INDICATORS,
+    **BRAND_SAFETY_CATEGORIES,
+}
+
+# A keyword can belong to several groups (e.g. "explicit"), so map each to all of them
+_KEYWORD_TO_GROUPS: Dict[str, Tuple[str, ...]] = {}
+for _group, _words in _KEYWORD_GROUPS.items():
+    for _word in _words:
+        _KEYWORD_TO_GROUPS[_word] = _KEYWORD_TO_GROUPS.get(_word, ()) + (_group,)
+
+if ahocorasick is not None:
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _word in _KEYWORD_TO_GROUPS:
+        _KEYWORD_AUTOMATON.add_word(_word, _word)
+    _KEYWORD_AUTOMATON.make_automaton()
+
+    def _iter_keyword_matches(content_text: str):
+        for _, word in _KEYWORD_AUTOMATON.iter(content_text):
+            yield word
+else:
+    # Lookahead so overlapping keywords are all reported, longest first
+    _KEYWORD_RE = re.compile("(?=({}))".format(
+        "|".join(map(re.escape, sorted(_KEYWORD_TO_GROUPS, key=len, reverse=True)))
+    ))
+
+    def _iter_keyword_matches(content_text: str):
+        for match in _KEYWORD_RE.finditer(content_text):
+            yield match.group(1)
+
+# Accepted targeting values, as frozensets for constant-time membership checks.
+# All are strings, so non-string (possibly unhashable) JSON values are rejected first
+_VALID_AGE_GROUPS = frozenset({"18-24", "25-34", "35-44", "45-54", "55+"})
+_VALID_GENDERS = frozenset({"male", "female", "non-binary", "all"})
+_VALID_INCOME_LEVELS = frozenset({"low", "medium", "high", "premium"})
+_VALID_COUNTRIES = frozenset({
+    "US", "CA", "UK", "AU", "DE", "FR", "ES", "IT", "NL", "SE",
+    "NO", "DK", "FI", "BR", "MX", "AR", "CL", "CO", "PE"
+})
+
+@lru_cache(maxsize=1024)
+def _scan_content(title: str, description: Optional[str]) -> Dict[str, frozenset]:
     """
-    Comprehensive campaign data validation.
+    Lowercase the ad copy once and find every known keyword in it, grouped by keyword group.
+    Memoized so the content and brand safety validators share one scan of the same copy.
+    """
+    content_text = f"{title} {description or ''}".lower()
+    matches = {group: set() for group in _KEYWORD_GROUPS}
+    for word in _iter_keyword_matches(content_text):
+        for group in _KEYWORD_TO_GROUPS[word]:
+            matches[group].add(word)
+    return {group: frozenset(words) for group, words in matches.items()}
+
+def _is_state_code(state: Any) -> bool:
+    """Two ASCII uppercase letters, checked with str methods rather than a regex."""
+    return (
+        isinstance(state, str) and len(state) == 2
+        and state.isascii() and state.isalpha() and state.isupper()
+    )
+
+def _parse_iso(value: Any) -> Any:
+    """
+    Parse an ISO-8601 string (a trailing 'Z' is accepted natively) and normalise
+    datetimes to aware UTC, treating naive values as UTC. Other values pass through.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+    return value
+
+def _coerce_dates(campaign_data: Dict) -> Tuple[Any, Any, Optional[str]]:
+    """
+    Parse the campaign's start and end dates once.
+    Returns (start_date, end_date, error); the dates are None when absent or unparseable.
+    """
+    if "start_date" not in campaign_data or "end_date" not in campaign_data:
+        return None, None, None
+    try:
+        return _parse_iso(campaign_data["start_date"]), _parse_iso(campaign_data["end_date"]), None
+    except ValueError as e:
+        return None, None, f"Invalid date format: {str(e)}"
+
+def _validate_campaign(campaign_data: Dict, now: datetime) -> Tuple[bool, List[str]]:
+    """
+    Comprehensive campaign data validation against a fixed current time.
     Returns (is_valid, list_of_errors)
     """
     errors = []
     
     # Required fields validation
-    required_fields = ["name", "advertiser_id", "start_date", "end_date", "budget"]
-    for field in required_fields:
-        if field not in campaign_data or not campaign_data[field]:
+    for field in _REQUIRED_CAMPAIGN_FIELDS:
+        if not campaign_data.get(field):
             errors.append(f"Missing required field: {field}")
     
     # Campaign name validation
@@ -26,43 +151,40 @@ def validate_campaign_data(campaign_data: Dict) -> Tuple[bool, List[str]]:
             errors.append("Campaign name must be at least 3 characters")
         if len(name) > 255:
             errors.append("Campaign name cannot exceed 255 characters")
-        if not re.match(r"^[a-zA-Z0-9\s\-_\.]+$", name):
+        if not _CAMPAIGN_NAME_RE.match(name):
             errors.append("Campaign name contains invalid characters")
     
     # Date validation
-    if "start_date" in campaign_data and "end_date" in campaign_data:
+    start_date, end_date, date_error = _coerce_dates(campaign_data)
+    if date_error:
+        errors.append(date_error)
+    elif "start_date" in campaign_data and "end_date" in campaign_data:
         try:
-            start_date = campaign_data["start_date"]
-            end_date = campaign_data["end_date"]
-            
-            if isinstance(start_date, str):
-                start_date = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            if isinstance(end_date, str):
-                end_date = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            
             if start_date >= end_date:
                 errors.append("End date must be after start date")
             
-            if start_date < datetime.now():
+            if start_date < now:
                 errors.append("Start date cannot be in the past")
             
             campaign_duration = (end_date - start_date).days
             if campaign_duration > 365:
                 errors.append("Campaign duration cannot exceed 365 days")
             
-        except (ValueError, TypeError) as e:
+        except TypeError as e:
             errors.append(f"Invalid date format: {str(e)}")
     
     # Budget validation
+    budget: Optional[float] = None
     if "budget" in campaign_data:
         try:
             budget = float(campaign_data["budget"])
+            # One ordered chain so each budget gets at most one range error
             if budget <= 0:
                 errors.append("Budget must be greater than 0")
-            if budget < 100:
-                errors.append("Minimum budget is $100")
-            if budget > 10000000:
-                errors.append("Maximum budget is $10,000,000")
+            elif budget < MIN_CAMPAIGN_BUDGET:
+                errors.append(f"Minimum budget is ${MIN_CAMPAIGN_BUDGET:,.0f}")
+            elif budget > MAX_CAMPAIGN_BUDGET:
+                errors.append(f"Maximum budget is ${MAX_CAMPAIGN_BUDGET:,.0f}")
         except (ValueError, TypeError):
             errors.append("Budget must be a valid number")
     
@@ -70,23 +192,16 @@ def validate_campaign_data(campaign_data: Dict) -> Tuple[bool, List[str]]:
     if "daily_budget" in campaign_data and campaign_data["daily_budget"]:
         try:
             daily_budget = float(campaign_data["daily_budget"])
-            total_budget = float(campaign_data.get("budget", 0))
             
             if daily_budget <= 0:
                 errors.append("Daily budget must be greater than 0")
             
-            if "start_date" in campaign_data and "end_date" in campaign_data:
+            # Reuse the budget and dates parsed once above; a missing or invalid
+            # value was already reported there
+            if budget is not None and start_date is not None and end_date is not None:
                 try:
-                    start_date = campaign_data["start_date"]
-                    end_date = campaign_data["end_date"]
-                    
-                    if isinstance(start_date, str):
-                        start_date = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                    if isinstance(end_date, str):
-                        end_date = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                    
                     campaign_days = (end_date - start_date).days + 1
-                    if daily_budget * campaign_days > total_budget:
+                    if daily_budget * campaign_days > budget:
                         errors.append("Daily budget exceeds total campaign budget")
                         
                 except (ValueError, TypeError):
@@ -106,6 +221,22 @@ def validate_campaign_data(campaign_data: Dict) -> Tuple[bool, List[str]]:
     
     return len(errors) == 0, errors
 
+def validate_campaign_data(campaign_data: Dict) -> Tuple[bool, List[str]]:
+    """
+    Comprehensive campaign data validation.
+    Returns (is_valid, list_of_errors)
+    """
+    return _validate_campaign(campaign_data, datetime.now(timezone.utc))
+
+def validate_campaigns_bulk(campaigns: List[Dict]) -> List[Tuple[bool, List[str]]]:
+    """
+    Validate a batch of campaigns, e.g. a bulk upload.
+    Every campaign is checked against the same current time.
+    Returns one (is_valid, list_of_errors) per campaign, in input order.
+    """
+    now = datetime.now(timezone.utc)
+    return [_validate_campaign(campaign_data, now) for campaign_data in campaigns]
+
 def validate_ad_content(title: str, description: Optional[str] = None) -> bool:
     """
     Validate ad content for compliance with guidelines.
@@ -121,56 +252,48 @@ def validate_ad_content(title: str, description: Optional[str] = None) -> bool:
     if description and len(description) > 500:
         return False
     
-    # Prohibited content check
-    prohibited_words = [
-        "explicit", "adult", "gambling", "illegal", "violence",
-        "hate", "discrimination", "inappropriate", "offensive"
-    ]
-    
-    content_text = f"{title} {description or ''}".lower()
+    matched = _scan_content(title, description)
     
-    for word in prohibited_words:
-        if word in content_text:
-            logger.warning(f"Prohibited word detected in ad content: {word}")
+    # Prohibited content check
+    for word in PROHIBITED_WORDS:
+        if word in matched["prohibited"]:
+            logger.warning("Prohibited word detected in ad content: %s", word)
             return False
     
-    # Required Disney-friendly content
-    positive_indicators = [
-        "family", "fun", "magical", "adventure", "wholesome",
-        "entertainment", "joy", "wonder", "imagination", "dreams"
-    ]
-    
     # At least one positive indicator should be present for Disney content
-    if not any(indicator in content_text for indicator in positive_indicators):
+    if not matched["positive"]:
         logger.info("Consider adding more family-friendly messaging")
     
     return True
 
-def validate_brand_safety(title: str, description: Optional[str] = None) -> bool:
+def validate_brand_safety(title: str, description: Optional[str] = None, collect_all: bool = False) -> bool:
     """
     Advanced brand safety validation using content analysis.
+    Stops at the first violation unless collect_all is set, in which case every
+    violation is gathered into the warning log.
     """
-    content_text = f"{title} {description or ''}".lower()
-    
-    # Brand safety categories to avoid
-    unsafe_categories = {
-        "violence": ["violence", "violent", "fight", "attack", "war", "weapon"],
-        "adult_content": ["adult", "mature", "explicit", "sexual", "intimate"],
-        "substances": ["alcohol", "drinking", "drugs", "smoking", "tobacco"],
-        "gambling": ["gambling", "casino", "betting", "lottery", "poker"],
-        "negative_sentiment": ["hate", "angry", "disgusting", "terrible", "awful"]
-    }
-    
-    violations = []
+    matched = _scan_content(title, description)
+    
+    # The full report is only for the log; skip building it when nobody will see it
+    if collect_all and logger.isEnabledFor(logging.WARNING):
+        violations = [
+            f"{category}: {keyword}"
+            for category, keywords in BRAND_SAFETY_CATEGORIES.items()
+            for keyword in keywords
+            if keyword in matched[category]
+        ]
+        
+        if violations:
+            logger.warning("Brand safety violations detected: %s", violations)
+            return False
+        
+        return True
     
-    for category, keywords in unsafe_categories.items():
+    for category, keywords in BRAND_SAFETY_CATEGORIES.items():
         for keyword in keywords:
-            if keyword in content_text:
-                violations.append(f"{category}: {keyword}")
-    
-    if violations:
-        logger.warning(f"Brand safety violations detected: {violations}")
-        return False
+            if keyword in matched[category]:
+                logger.warning("Brand safety violation detected: %s: %s", category, keyword)
+                return False
     
     return True
 
@@ -185,37 +308,31 @@ def validate_demographic_targeting(demographics: Dict) -> List[str]:
     # Age groups validation
     if "age_groups" in demographics:
         age_groups = demographics["age_groups"]
-        valid_age_groups = ["18-24", "25-34", "35-44", "45-54", "55+"]
-        
         if not isinstance(age_groups, list):
             errors.append("Age groups must be a list")
         else:
             for age_group in age_groups:
-                if age_group not in valid_age_groups:
+                if not isinstance(age_group, str) or age_group not in _VALID_AGE_GROUPS:
                     errors.append(f"Invalid age group: {age_group}")
     
     # Gender validation
     if "genders" in demographics:
         genders = demographics["genders"]
-        valid_genders = ["male", "female", "non-binary", "all"]
-        
         if not isinstance(genders, list):
             errors.append("Genders must be a list")
         else:
             for gender in genders:
-                if gender not in valid_genders:
+                if not isinstance(gender, str) or gender not in _VALID_GENDERS:
                     errors.append(f"Invalid gender: {gender}")
     
     # Income validation
     if "income_levels" in demographics:
         income_levels = demographics["income_levels"]
-        valid_income_levels = ["low", "medium", "high", "premium"]
-        
         if not isinstance(income_levels, list):
             errors.append("Income levels must be a list")
         else:
             for income in income_levels:
-                if income not in valid_income_levels:
+                if not isinstance(income, str) or income not in _VALID_INCOME_LEVELS:
                     errors.append(f"Invalid income level: {income}")
     
     return errors
@@ -228,19 +345,18 @@ def validate_geographic_targeting(geographic: Dict) -> List[str]:
         errors.append("Geographic targeting must be a dictionary")
         return errors
     
+    # No targeting configured (the common case): nothing further to check
+    if not geographic:
+        return errors
+    
     # Countries validation
     if "countries" in geographic:
         countries = geographic["countries"]
-        valid_countries = [
-            "US", "CA", "UK", "AU", "DE", "FR", "ES", "IT", "NL", "SE",
-            "NO", "DK", "FI", "BR", "MX", "AR", "CL", "CO", "PE"
-        ]
-        
         if not isinstance(countries, list):
             errors.append("Countries must be a list")
         else:
             for country in countries:
-                if country not in valid_countries:
+                if not isinstance(country, str) or country not in _VALID_COUNTRIES:
                     errors.append(f"Invalid or unsupported country: {country}")
     
     # States/Regions validation (for US)
@@ -251,7 +367,7 @@ def validate_geographic_targeting(geographic: Dict) -> List[str]:
         else:
             # Validate US state codes
             for state in states:
-                if not re.match(r"^[A-Z]{2}$", state):
+                if not _is_state_code(state):
                     errors.append(f"Invalid state code format: {state}")
     
     # Cities validation
@@ -271,23 +387,20 @@ def validate_advertiser_data(advertiser_data: Dict) -> Tuple[bool, List[str]]:
     errors = []
     
     # Required fields
-    required_fields = ["name", "company_name", "contact_email"]
-    for field in required_fields:
-        if field not in advertiser_data or not advertiser_data[field]:
+    for field in _REQUIRED_ADVERTISER_FIELDS:
+        if not advertiser_data.get(field):
             errors.append(f"Missing required field: {field}")
     
     # Email validation
     if "contact_email" in advertiser_data:
         email = advertiser_data["contact_email"]
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, email):
+        if not _EMAIL_RE.match(email):
             errors.append("Invalid email format")
     
     # Phone validation
     if "contact_phone" in advertiser_data and advertiser_data["contact_phone"]:
         phone = advertiser_data["contact_phone"]
-        phone_pattern = r'^\+?1?-?\.?\s?\(?(\d{3})\)?[-\.\s]?(\d{3})[-\.\s]?(\d{4})$'
-        if not re.match(phone_pattern, phone):
+        if not _PHONE_RE.match(phone):
             errors.append("Invalid phone number format")
     
     # Monthly spend validation
@@ -334,7 +447,7 @@ def validate_file_upload(file_data: Dict) -> Tuple[bool, List[str]]:
     # Filename validation
     if "filename" in file_data:
         filename = file_data["filename"]
-        if not re.match(r'^[a-zA-Z0-9._-]+$', filename):
+        if not _FILENAME_RE.match(filename):
             errors.append("Filename contains invalid characters")
         
         if len(filename) > 255:
@@ -348,7 +461,7 @@ def sanitize_input(text: str) -> str:
         return ""
     
     # Remove potentially dangerous characters
-    sanitized = re.sub(r'[<>"\'\&]', '', text)
+    sanitized = _UNSAFE_INPUT_CHARS_RE.sub('', text)
     
     # Trim whitespace
     sanitized = sanitized.strip()
@@ -361,7 +474,7 @@ def validate_api_key(api_key: str) -> bool:
         return False
     
     # API key should be alphanumeric with dashes/underscores
-    if not re.match(r'^[a-zA-Z0-9_-]+$', api_key):
+    if not _API_KEY_RE.match(api_key):
         return False
     
     # Should be reasonable length
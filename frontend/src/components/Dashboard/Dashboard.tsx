@@ -31,7 +31,7 @@ const Dashboard: React.FC = () => {
 
   const { data: campaigns, isLoading, error } = useQuery(
     ['campaigns', selectedTimeRange],
-    () => campaignAPI.getCampaigns({ limit: 10 }),
+    () => campaignAPI.getCampaigns({ limit: 10 }).then((page) => page.items),
     { refetchInterval: 30000 } // Refresh every 30 seconds
   );
 
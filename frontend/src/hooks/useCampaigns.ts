@@ -5,7 +5,7 @@ import { Campaign } from '../types';
 import { useCallback } from 'react';
 
 interface UseCampaignsOptions {
-  skip?: number;
+  cursor?: string;
   limit?: number;
   status?: string;
   advertiser_id?: string;
@@ -57,7 +57,8 @@ export const useCampaigns = (options: UseCampaignsOptions = {}) => {
   );
 
   return {
-    campaigns: campaignsQuery.data || [],
+    campaigns: campaignsQuery.data?.items || [],
+    nextCursor: campaignsQuery.data?.next_cursor ?? null,
     isLoading: campaignsQuery.isLoading,
     error: campaignsQuery.error,
     refetch: campaignsQuery.refetch,
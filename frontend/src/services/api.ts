@@ -1,6 +1,6 @@
 // src/services/api.ts
 import axios from 'axios';
-import { Campaign, Advertiser, CampaignPerformance } from '../types';
+import { Campaign, Advertiser, CampaignPerformance, Page } from '../types';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
@@ -37,11 +37,11 @@ apiClient.interceptors.response.use(
 
 export const campaignAPI = {
   getCampaigns: async (params?: {
-    skip?: number;
+    cursor?: string;
     limit?: number;
     status?: string;
     advertiser_id?: string;
-  }) => {
+  }): Promise<Page<Campaign>> => {
     const response = await apiClient.get('/api/v1/campaigns', { params });
     return response.data;
   },
@@ -75,7 +75,7 @@ export const campaignAPI = {
 export const advertiserAPI = {
   getAdvertisers: async (): Promise<Advertiser[]> => {
     const response = await apiClient.get('/api/v1/advertisers');
-    return response.data;
+    return response.data.items;
   },
 
   getAdvertiser: async (id: string): Promise<Advertiser> => {
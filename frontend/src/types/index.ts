@@ -29,6 +29,11 @@ export interface Advertiser {
   is_active: boolean;
 }
 
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 export interface AdMetrics {
   id: string;
   campaign_id: string;